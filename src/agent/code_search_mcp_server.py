@@ -0,0 +1,71 @@
+"""
+Code Search MCP Server
+
+This module provides an MCP server with a tool for retrieving the code sections most relevant to a natural
+language query, from an embedding index built with src/main/build_code_index.py.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+from mcp.server import FastMCP
+
+from src.embedding.code_index import CodeEmbeddingIndex
+
+load_dotenv("./env/.env")
+
+CODE_INDEX_DIR = os.getenv("CODE_INDEX_DIR", "./code_index")
+
+# stdout carries this stdio server's JSON-RPC stream, so diagnostics go through logging (stderr)
+logger = logging.getLogger(__name__)
+
+mcp = FastMCP("Code Search")
+
+code_index: Optional[CodeEmbeddingIndex] = None
+
+
+def loaded_index() -> CodeEmbeddingIndex:
+    # Opened on the first search; the vectors are memory-mapped, so this is cheap. Picks up refreshes and
+    # compactions made by build_code_index since.
+    global code_index
+    if code_index is None:
+        code_index = CodeEmbeddingIndex.from_env(CODE_INDEX_DIR)
+    code_index.reload_if_changed()
+    return code_index
+
+
+@mcp.tool()
+async def searchCode(query: str, k: int = 5) -> dict[str, Any]:
+    """
+    Find the code sections most relevant to a natural language description, without regex scans.
+
+    Args:
+        query: What the code should do or contain, e.g. "validates the account number and sets the return code"
+        k: The number of sections to return
+
+    Returns:
+        A dictionary with the matching sections (file, section label, line range, similarity and source text),
+        most similar first
+    """
+    try:
+        results = await asyncio.to_thread(loaded_index().search, query, k)
+        return {
+            "success": True,
+            "results": [{"path": chunk.path, "section": chunk.section, "start_line": chunk.start_line,
+                         "end_line": chunk.end_line, "score": round(score, 4), "text": chunk.text}
+                        for chunk, score in results]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"An error occurred: {str(e)}"
+        }
+
+
+if __name__ == "__main__":
+    # Initialize and run the server
+    logger.info("Starting Code Search MCP server...")
+    mcp.run(transport='stdio')
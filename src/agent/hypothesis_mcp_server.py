@@ -5,8 +5,11 @@ This module provides an MCP server with tools for creating Hypothesis objects,
 and updating and deleting HypothesisSubject and HypothesisObject in Neo4J.
 """
 
+import asyncio
+import logging
 import os
-from typing import Any, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 
 from dotenv import load_dotenv
 from mcp.server import FastMCP
@@ -28,15 +31,49 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
 
+# Merge Subjects/Objects on their normalised name instead of creating a new node per hypothesis
+ENTITY_RESOLUTION = os.getenv("ENTITY_RESOLUTION", "false").lower() == "true"
+
+# Interval for the orphan Subject/Object garbage collector; 0 disables it
+ORPHAN_GC_INTERVAL_SECONDS = int(os.getenv("ORPHAN_GC_INTERVAL_SECONDS", "0"))
+
+# stdout carries this stdio server's JSON-RPC stream, so diagnostics go through logging (stderr)
+logger = logging.getLogger(__name__)
+
 # Initialize the Neo4j operations with a custom ID provider
 id_provider = UuidProvider()
 neo4j_ops = Neo4jOperations(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, id_provider=id_provider)
 
 # Initialize the Hypothesis operations
-hypothesis_ops = HypothesisOperations(neo4j_ops)
+hypothesis_ops = HypothesisOperations(neo4j_ops, resolve_entities=ENTITY_RESOLUTION)
+
+
+async def collect_orphans_periodically(interval_seconds: int) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted_count = await asyncio.to_thread(hypothesis_ops.collect_orphans)
+            logger.info("Orphan collection removed %d subjects/objects", deleted_count)
+        except Exception as e:
+            logger.warning("Orphan collection failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    if ENTITY_RESOLUTION:
+        await asyncio.to_thread(hypothesis_ops.create_entity_constraints)
+    if ORPHAN_GC_INTERVAL_SECONDS <= 0:
+        yield
+        return
+    gc_task = asyncio.create_task(collect_orphans_periodically(ORPHAN_GC_INTERVAL_SECONDS))
+    try:
+        yield
+    finally:
+        gc_task.cancel()
+
 
 # Create the MCP server
-mcp = FastMCP("Hypothesis Operations")
+mcp = FastMCP("Hypothesis Operations", lifespan=lifespan)
 
 
 @mcp.tool()
@@ -292,6 +329,103 @@ async def delete_hypothesis(hypothesis_id: str, keep_subject_object: bool = Fals
         }
 
 
+@mcp.tool()
+async def get_hypotheses(hypothesis_ids: list[str]) -> dict[str, Any]:
+    """
+    Get multiple hypotheses by their IDs in a single call.
+
+    Args:
+        hypothesis_ids: The IDs of the hypotheses to retrieve
+
+    Returns:
+        A dictionary containing the hypotheses found and the IDs which were not found
+    """
+    try:
+        hypotheses = hypothesis_ops.read_hypotheses(hypothesis_ids)
+
+        result = []
+        for h in hypotheses:
+            result.append({
+                "id": h.id,
+                "subject": {
+                    "id": h.subject.id,
+                    "name": h.subject.name
+                },
+                "relation": h.relation,
+                "object": {
+                    "id": h.object.id,
+                    "name": h.object.name
+                },
+                "belief": h.belief.to_dict()
+            })
+
+        found_ids = {h.id for h in hypotheses}
+        return {
+            "success": True,
+            "count": len(result),
+            "hypotheses": result,
+            "not_found_ids": [hypothesis_id for hypothesis_id in hypothesis_ids if hypothesis_id not in found_ids]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"An error occurred: {str(e)}"
+        }
+
+
+@mcp.tool()
+async def delete_hypotheses(hypothesis_ids: list[str], keep_subject_object: bool = False) -> dict[str, Any]:
+    """
+    Delete multiple hypotheses by their IDs in a single call.
+
+    Args:
+        hypothesis_ids: The IDs of the hypotheses to delete
+        keep_subject_object: If True, keep the subject and object nodes even if no other hypothesis uses them.
+            Useful for large bulk deletes; orphans are then removed by collect_orphans.
+
+    Returns:
+        A dictionary containing the deleted IDs and the IDs which were not found
+    """
+    try:
+        deleted_ids = hypothesis_ops.delete_hypotheses(hypothesis_ids, keep_subject_object=keep_subject_object)
+
+        deleted = set(deleted_ids)
+        return {
+            "success": True,
+            "deleted_count": len(deleted_ids),
+            "deleted_ids": deleted_ids,
+            "not_found_ids": [hypothesis_id for hypothesis_id in hypothesis_ids if hypothesis_id not in deleted]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"An error occurred: {str(e)}"
+        }
+
+
+@mcp.tool()
+async def collect_orphans() -> dict[str, Any]:
+    """
+    Delete all subjects and objects which are not used by any hypothesis.
+
+    Returns:
+        A dictionary containing the number of deleted subjects and objects
+    """
+    try:
+        deleted_count = hypothesis_ops.collect_orphans()
+
+        return {
+            "success": True,
+            "deleted_count": deleted_count,
+            "message": f"Deleted {deleted_count} orphaned subjects/objects"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"An error occurred: {str(e)}"
+        }
+
+
 @mcp.tool()
 async def find_hypotheses(subject: Optional[str] = None, relation: Optional[str] = None,
                           object_: Optional[str] = None, min_alpha: Optional[int] = None,
@@ -382,7 +516,7 @@ async def update_subject(subject_id: str, name: Optional[str] = None) -> dict[st
         properties = {}
 
         if name is not None:
-            properties["name"] = name
+            properties.update(hypothesis_ops.entity_properties(name))
 
         if not properties:
             return {
@@ -390,6 +524,15 @@ async def update_subject(subject_id: str, name: Optional[str] = None) -> dict[st
                 "error": "No properties provided for update"
             }
 
+        # A resolved name belongs to one entity only
+        if hypothesis_ops.resolve_entities:
+            existing_id = hypothesis_ops.entity_with_name("Subject", name)
+            if existing_id is not None and existing_id != subject_id:
+                return {
+                    "success": False,
+                    "error": f"Name {name} already used by subject {existing_id}"
+                }
+
         # Update the subject node
         updated = neo4j_ops.update_node(subject_id, properties)
 
@@ -423,7 +566,7 @@ async def delete_subject(subject_id: str) -> dict[str, Any]:
     """
     try:
         # Check if the subject is used in any hypotheses
-        subject_used = hypothesis_ops._is_node_used_elsewhere(subject_id)
+        subject_used = hypothesis_ops._is_node_used_elsewhere(subject_id, "Subject")
 
         if subject_used:
             return {
@@ -477,7 +620,7 @@ async def update_object(object_id: str, name: Optional[str] = None) -> dict[str,
         properties = {}
 
         if name is not None:
-            properties["name"] = name
+            properties.update(hypothesis_ops.entity_properties(name))
 
         if not properties:
             return {
@@ -485,6 +628,15 @@ async def update_object(object_id: str, name: Optional[str] = None) -> dict[str,
                 "error": "No properties provided for update"
             }
 
+        # A resolved name belongs to one entity only
+        if hypothesis_ops.resolve_entities:
+            existing_id = hypothesis_ops.entity_with_name("Object", name)
+            if existing_id is not None and existing_id != object_id:
+                return {
+                    "success": False,
+                    "error": f"Name {name} already used by object {existing_id}"
+                }
+
         # Update the object node
         updated = neo4j_ops.update_node(object_id, properties)
 
@@ -518,7 +670,7 @@ async def delete_object(object_id: str) -> dict[str, Any]:
     """
     try:
         # Check if the object is used in any hypotheses
-        object_used = hypothesis_ops._is_node_used_elsewhere(object_id)
+        object_used = hypothesis_ops._is_node_used_elsewhere(object_id, "Object")
 
         if object_used:
             return {
@@ -563,12 +715,8 @@ async def create_subject(name: str) -> dict[str, Any]:
             name=name
         )
 
-        # Create the subject node in Neo4j
-        subject_id = neo4j_ops.create_node(node_type="Subject", properties={
-            "name": subject.name,
-            "id": subject.id,
-            **subject.additional_properties
-        })
+        # Create (or resolve) the subject node in Neo4j
+        subject_id = hypothesis_ops.create_entity("Subject", subject.name, subject.id)
 
         return {
             "success": True,
@@ -604,12 +752,8 @@ async def create_object(name: str) -> dict[str, Any]:
             name=name
         )
 
-        # Create the object node in Neo4j
-        object_id = neo4j_ops.create_node(node_type="Object", properties={
-            "name": object_.name,
-            "id": object_.id,
-            **object_.additional_properties
-        })
+        # Create (or resolve) the object node in Neo4j
+        object_id = hypothesis_ops.create_entity("Object", object_.name, object_.id)
 
         return {
             "success": True,
@@ -0,0 +1,74 @@
+from typing import Protocol, runtime_checkable
+
+import numpy as np
+
+SUMMED_EVIDENCE = "summed"
+CONTRIBUTION_WEIGHTED_POOL = "contribution_weighted"
+LOGARITHMIC_OPINION_POOL = "log_pool"
+
+
+@runtime_checkable
+class AggregationStrategy(Protocol):
+    """
+    Combines children's Beta beliefs into their parent's belief. Every strategy is expressed as a sum of
+    per-child terms followed by a pooling step, so a whole tree aggregates in one bottom-up pass and a single
+    changed child can be applied to its parent as a delta.
+    """
+
+    def terms(self, alphas, betas, weights) -> tuple:
+        """Return the per-child (alpha, beta, weight) terms which are summed for each parent."""
+        ...
+
+    def pooled(self, alpha_sums, beta_sums, weight_sums) -> tuple:
+        """Return the parent (alpha, beta) from the summed terms of its children."""
+        ...
+
+
+class SummedEvidence(AggregationStrategy):
+    # Original behaviour: all children count equally, with the parent's alpha doubled
+    def terms(self, alphas, betas, weights) -> tuple:
+        return alphas, betas, np.ones_like(weights)
+
+    def pooled(self, alpha_sums, beta_sums, weight_sums) -> tuple:
+        return alpha_sums * 2, beta_sums
+
+
+class ContributionWeightedPool(AggregationStrategy):
+    # Each child's evidence counts in proportion to its contribution_to_root / contribution_to_hypothesis
+    def terms(self, alphas, betas, weights) -> tuple:
+        return alphas * weights, betas * weights, weights
+
+    def pooled(self, alpha_sums, beta_sums, weight_sums) -> tuple:
+        return alpha_sums, beta_sums
+
+
+class LogarithmicOpinionPool(AggregationStrategy):
+    # Normalised weighted geometric pool of the children's Beta densities, which is again a Beta whose
+    # pseudo-counts are the contribution-weighted average of the children's pseudo-counts
+    def terms(self, alphas, betas, weights) -> tuple:
+        return alphas * weights, betas * weights, weights
+
+    def pooled(self, alpha_sums, beta_sums, weight_sums) -> tuple:
+        has_weight = weight_sums > 0
+        safe_weight_sums = np.where(has_weight, weight_sums, 1.0)
+        return (np.where(has_weight, alpha_sums / safe_weight_sums, 0.0),
+                np.where(has_weight, beta_sums / safe_weight_sums, 0.0))
+
+
+AGGREGATION_STRATEGIES: dict[str, AggregationStrategy] = {
+    SUMMED_EVIDENCE: SummedEvidence(),
+    CONTRIBUTION_WEIGHTED_POOL: ContributionWeightedPool(),
+    LOGARITHMIC_OPINION_POOL: LogarithmicOpinionPool(),
+}
+
+
+def aggregation_strategy(name: str) -> AggregationStrategy:
+    if name not in AGGREGATION_STRATEGIES:
+        raise ValueError(f"Unknown aggregation strategy '{name}', expected one of {list(AGGREGATION_STRATEGIES)}")
+    return AGGREGATION_STRATEGIES[name]
+
+
+def as_count(value) -> int | float:
+    # Keep integral pseudo-counts as ints so beliefs print as before under the summed strategy
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -8,11 +8,11 @@ from src.domain.belief import BeliefProtocol
 
 
 @dataclass_json
-@dataclass(frozen=True, slots=True, order=True)
+@dataclass(frozen=True, slots=True)
 class BetaBernoulliBelief(BeliefProtocol):
-    alpha: int
-    beta: int
-    id: str = field(default_factory=lambda: str(uuid.uuid4()), compare=False)
+    alpha: int = field(compare=False)
+    beta: int = field(compare=False)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
     def __repr__(self) -> str:
         return f"({self.alpha}, {self.beta})"
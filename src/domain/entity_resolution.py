@@ -0,0 +1,11 @@
+def normalised_name(name: str) -> str:
+    # "Program", " program " and "PROGRAM" all resolve to the same Subject/Object
+    return " ".join(name.split()).lower()
+
+
+def normalised_name_cypher(name: str) -> str:
+    # The same normalisation as a Cypher expression over the given name expression, for grouping entities inside
+    # the database. Spaces, tabs, newlines and carriage returns separate words.
+    words = f'split(replace(replace(replace(coalesce({name}, ""), "\\t", " "), "\\n", " "), "\\r", " "), " ")'
+    return (f'toLower(reduce(key = "", word IN [word IN {words} WHERE word <> ""] | '
+            f'key + CASE key WHEN "" THEN "" ELSE " " END + word))')
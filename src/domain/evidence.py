@@ -8,12 +8,12 @@ from src.domain.random_words import random_text
 
 
 @dataclass_json
-@dataclass(frozen=False, slots=True, order=True)
+@dataclass(frozen=False, slots=True, unsafe_hash=True)
 class Evidence:
-    evidence_description: str
-    contribution_to_hypothesis: float
-    belief: BetaBernoulliBelief
-    id: str = field(default_factory=lambda: str(uuid.uuid4()), compare=False)
+    evidence_description: str = field(compare=False)
+    contribution_to_hypothesis: float = field(compare=False)
+    belief: BetaBernoulliBelief = field(compare=False)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
     def __post_init__(self):
         if not isinstance(self.contribution_to_hypothesis, (int, float)):
@@ -0,0 +1,104 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Self
+
+import numpy as np
+
+from src.domain.aggregation_strategy import AggregationStrategy, SummedEvidence, as_count
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.induction_node import InferenceNode
+
+NO_PARENT = -1
+
+
+@dataclass(slots=True)
+class FlatInferenceTree:
+    """
+    Array form of an InferenceNode tree, in level order, so that posteriors can be aggregated without
+    recursion and batch statistics can be computed across thousands of beliefs at once.
+    Index i of every array describes nodes[i]; parents[i] is the index of its parent (NO_PARENT for roots).
+    """
+    nodes: list[InferenceNode]
+    parents: np.ndarray
+    depths: np.ndarray
+    alphas: np.ndarray
+    betas: np.ndarray
+    contributions: np.ndarray
+
+    @classmethod
+    def from_tree(cls, root: InferenceNode) -> Self:
+        nodes: list[InferenceNode] = []
+        parents: list[int] = []
+        depths: list[int] = []
+        queue = deque([(root, NO_PARENT, 0)])
+        while queue:
+            inference_node, parent_index, depth = queue.popleft()
+            index = len(nodes)
+            nodes.append(inference_node)
+            parents.append(parent_index)
+            depths.append(depth)
+            queue.extend((child, index, depth + 1) for child in inference_node.children)
+
+        return cls(nodes=nodes,
+                   parents=np.array(parents, dtype=np.int64),
+                   depths=np.array(depths, dtype=np.int64),
+                   alphas=np.array([n.node.belief.alpha for n in nodes], dtype=np.float64),
+                   betas=np.array([n.node.belief.beta for n in nodes], dtype=np.float64),
+                   contributions=np.array([n.contribution() for n in nodes], dtype=np.float64))
+
+    @classmethod
+    def from_beliefs(cls, beliefs: list[BetaBernoulliBelief]) -> Self:
+        # A forest of unconnected beliefs, e.g. every hypothesis returned by find_hypotheses
+        count = len(beliefs)
+        return cls(nodes=[],
+                   parents=np.full(count, NO_PARENT, dtype=np.int64),
+                   depths=np.zeros(count, dtype=np.int64),
+                   alphas=np.array([b.alpha for b in beliefs], dtype=np.float64),
+                   betas=np.array([b.beta for b in beliefs], dtype=np.float64),
+                   contributions=np.ones(count, dtype=np.float64))
+
+    def leaves(self) -> np.ndarray:
+        child_counts = np.bincount(self.parents[self.parents != NO_PARENT], minlength=len(self.parents))
+        return child_counts == 0
+
+    def aggregate(self, strategy: AggregationStrategy = SummedEvidence()) -> tuple[np.ndarray, ...]:
+        """
+        Recompute every internal node's belief bottom-up, one depth level at a time, using the given strategy
+        and each child's contribution as its weight. Returns the per-node sums of the children's terms.
+        """
+        is_leaf = self.leaves()
+        term_sums = tuple(np.zeros(len(self.alphas)) for _ in range(3))
+        for depth in range(int(self.depths.max(initial=0)), 0, -1):
+            level = np.flatnonzero(self.depths == depth)
+            for term_sum, term in zip(term_sums,
+                                      strategy.terms(self.alphas[level], self.betas[level], self.contributions[level])):
+                np.add.at(term_sum, self.parents[level], term)
+            parent_level = np.flatnonzero((self.depths == depth - 1) & ~is_leaf)
+            self.alphas[parent_level], self.betas[parent_level] = strategy.pooled(
+                *(term_sum[parent_level] for term_sum in term_sums))
+        return term_sums
+
+    def write_back(self, term_sums: Optional[tuple[np.ndarray, ...]] = None) -> None:
+        is_leaf = self.leaves()
+        for index in np.flatnonzero(~is_leaf):
+            inference_node = self.nodes[index]
+            inference_node.node.belief = BetaBernoulliBelief(as_count(self.alphas[index]),
+                                                             as_count(self.betas[index]))
+            if term_sums is not None:
+                inference_node.children_terms = tuple(float(term_sum[index]) for term_sum in term_sums)
+
+    def posterior_means(self) -> np.ndarray:
+        totals = self.alphas + self.betas
+        return np.divide(self.alphas, totals, out=np.full(len(totals), 0.5), where=totals != 0)
+
+    def sample(self, size: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        # Same distribution as BetaBernoulliBelief.sample(), drawn for every node at once: shape (size, nodes)
+        rng = rng if rng is not None else np.random.default_rng()
+        return rng.beta(self.alphas + 1, self.betas + 1, size=(size, len(self.alphas)))
+
+    def credible_intervals(self, mass: float = 0.95, samples: int = 4000,
+                           rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        # Monte Carlo equal-tailed intervals, shape (nodes, 2)
+        tail = (1 - mass) / 2
+        return np.quantile(self.sample(samples, rng), [tail, 1 - tail], axis=0).T
+
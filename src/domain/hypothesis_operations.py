@@ -1,6 +1,9 @@
 from typing import Optional, Any
 
+from neo4j import ManagedTransaction
+
 from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.entity_resolution import normalised_name, normalised_name_cypher
 from src.domain.hypothesis import Hypothesis
 from src.domain.hypothesis_object import HypothesisObject
 from src.domain.hypothesis_subject import HypothesisSubject
@@ -8,51 +11,129 @@ from src.domain.neo4j_operations import Neo4jOperations
 
 
 class HypothesisOperations:
-    def __init__(self, neo4j_ops: Neo4jOperations):
+    def __init__(self, neo4j_ops: Neo4jOperations, resolve_entities: bool = False):
         self.neo4j_ops = neo4j_ops
+        # When set, Subjects and Objects are MERGEd on their normalised name instead of always created
+        self.resolve_entities = resolve_entities
 
     def create_hypothesis(self, hypothesis: Hypothesis) -> str:
-        # Check if subject node already exists
-        existing_subject = self.neo4j_ops.read_node(hypothesis.subject.id)
-        if existing_subject:
-            # Use existing subject node
-            subject_id = hypothesis.subject.id
-        else:
-            # Create subject node with the provided ID
-            subject_id = self.neo4j_ops.create_node(node_type="Subject", properties={
-                "name": hypothesis.subject.name,
-                "id": hypothesis.subject.id
-            })
-
-        # Check if object node already exists
-        existing_object = self.neo4j_ops.read_node(hypothesis.object.id)
-        if existing_object:
-            # Use existing object node
-            object_id = hypothesis.object.id
-        else:
-            # Create object node with the provided ID
-            object_id = self.neo4j_ops.create_node(node_type="Object", properties={
-                "name": hypothesis.object.name,
-                "id": hypothesis.object.id
-            })
+        # Subject, Object, Relation and both FLOWS_TO edges are written in one transaction, so the orphan
+        # collector never sees a fresh Subject/Object before its edges exist
+        with self.neo4j_ops._get_session() as session:
+            return session.execute_write(self._create_hypothesis_in, hypothesis)
+
+    def _create_hypothesis_in(self, tx: ManagedTransaction, hypothesis: Hypothesis) -> str:
+        hypothesis.subject.id = self._entity_id_in(tx, "Subject", hypothesis.subject.name, hypothesis.subject.id)
+        hypothesis.object.id = self._entity_id_in(tx, "Object", hypothesis.object.name, hypothesis.object.id)
 
-        # Create relation node with belief
+        # Create relation node with belief, linked to its subject and object
         belief_dict = hypothesis.belief.to_dict()
-        relation_id = self.neo4j_ops.create_node(node_type="Relation", properties={
-            "name": hypothesis.relation,
-            "belief_alpha": belief_dict.get("alpha", 1),
-            "belief_beta": belief_dict.get("beta", 1),
-            "id": hypothesis.id,  # Use the hypothesis ID for the relation node
-            "hypothesisId": hypothesis.id,  # Store the hypothesis ID for reference
-            "subject_id": subject_id,  # Store the subject ID for reference
-            "object_id": object_id  # Store the object ID for reference
-        })
+        query = """
+        MATCH (s {id: $subject_id}), (o {id: $object_id})
+        CREATE (s)-[:FLOWS_TO]->(r:Relation {nodeType: "Relation", name: $name, belief_alpha: $belief_alpha,
+                                             belief_beta: $belief_beta, id: $id, hypothesisId: $id,
+                                             subject_id: $subject_id, object_id: $object_id})-[:FLOWS_TO]->(o)
+        """
+        tx.run(query, subject_id=hypothesis.subject.id, object_id=hypothesis.object.id, name=hypothesis.relation,
+               belief_alpha=belief_dict.get("alpha", 1), belief_beta=belief_dict.get("beta", 1),
+               id=hypothesis.id).consume()
+        return hypothesis.id
 
-        # Create relationships between nodes
-        self._create_relationship(subject_id, relation_id, "FLOWS_TO")
-        self._create_relationship(relation_id, object_id, "FLOWS_TO")
+    def _entity_id_in(self, tx: ManagedTransaction, node_type: str, name: str, entity_id: str) -> str:
+        # Uses the node with this id if it exists, otherwise creates (or resolves) one
+        if tx.run("MATCH (n {id: $id}) RETURN n.id AS id", id=entity_id).single():
+            return entity_id
+        return self._create_entity_in(tx, node_type, name, entity_id)
+
+    def _link_entity_in(self, tx: ManagedTransaction, node_type: str, name: str, entity_id: str,
+                        relation_id: str, previous_id: Optional[str]) -> str:
+        # Moves the relation's Subject/Object edge to the given entity, creating the entity in the same transaction
+        entity_id = self._entity_id_in(tx, node_type, name, entity_id)
+        edge = "(e)-[:FLOWS_TO]->(r)" if node_type == "Subject" else "(r)-[:FLOWS_TO]->(e)"
+        old_edge = "(:Subject {id: $previous_id})-[old:FLOWS_TO]->(r)" if node_type == "Subject" \
+            else "(r)-[old:FLOWS_TO]->(:Object {id: $previous_id})"
+        if previous_id is not None:
+            tx.run(f"MATCH {old_edge} WHERE r.id = $relation_id DELETE old", previous_id=previous_id,
+                   relation_id=relation_id).consume()
+        tx.run(f"MATCH (e {{id: $entity_id}}), (r {{id: $relation_id}}) CREATE {edge}", entity_id=entity_id,
+               relation_id=relation_id).consume()
+        return entity_id
+
+    def create_entity(self, node_type: str, name: str, entity_id: str) -> str:
+        with self.neo4j_ops._get_session() as session:
+            return session.execute_write(self._create_entity_in, node_type, name, entity_id)
 
-        return hypothesis.id
+    def _create_entity_in(self, tx: ManagedTransaction, node_type: str, name: str, entity_id: str) -> str:
+        if not self.resolve_entities:
+            query = f"CREATE (n:{node_type} {{name: $name, id: $id, nodeType: $node_type}}) RETURN n.id as id"
+            return tx.run(query, name=name, id=entity_id, node_type=node_type).single()["id"]
+
+        # Reuse whichever node already carries this normalised name, so the same entity is never duplicated
+        query = f"""
+        MERGE (n:{node_type} {{normalisedName: $normalised_name}})
+        ON CREATE SET n.id = $id, n.name = $name, n.nodeType = $node_type
+        RETURN n.id as id
+        """
+        return tx.run(query, normalised_name=normalised_name(name), id=entity_id, name=name,
+                      node_type=node_type).single()["id"]
+
+    def create_entity_constraints(self) -> None:
+        # Backs the MERGE in create_entity with an index and guards against concurrent duplicate creation
+        with self.neo4j_ops._get_session() as session:
+            for node_type in ["Subject", "Object"]:
+                session.run(f"""
+                CREATE CONSTRAINT {node_type.lower()}_normalised_name IF NOT EXISTS
+                FOR (n:{node_type}) REQUIRE n.normalisedName IS UNIQUE
+                """)
+
+    def merge_duplicate_entities(self) -> dict[str, int]:
+        # One-off migration: collapse Subjects/Objects sharing a normalised name onto a single node. Each node type
+        # is grouped, rewired and keyed in one transaction, so a failure never leaves survivors without their key.
+        with self.neo4j_ops._get_session() as session:
+            return {node_type: session.execute_write(self._merge_duplicate_entities_in, node_type)
+                    for node_type in ["Subject", "Object"]}
+
+    @staticmethod
+    def _merge_duplicate_entities_in(tx: ManagedTransaction, node_type: str) -> int:
+        relationship_pattern, new_relationship, reference_property = {
+            "Subject": ("(duplicate)-[old:FLOWS_TO]->(r:Relation)", "(keep)-[:FLOWS_TO]->(r)", "subject_id"),
+            "Object": ("(r:Relation)-[old:FLOWS_TO]->(duplicate)", "(r)-[:FLOWS_TO]->(keep)", "object_id"),
+        }[node_type]
+        # A node which already carries its key survives, so the uniqueness constraint is never violated
+        rewire_query = f"""
+        MATCH (n:{node_type})
+        WITH n, {normalised_name_cypher("n.name")} AS key
+        ORDER BY n.normalisedName IS NULL, n.id
+        WITH key, collect(n) AS nodes
+        WHERE size(nodes) > 1
+        UNWIND tail(nodes) AS duplicate
+        WITH head(nodes) AS keep, duplicate
+        OPTIONAL MATCH {relationship_pattern}
+        WITH keep, duplicate, collect(old) AS old_edges, collect(r) AS relations
+        FOREACH (r IN relations | CREATE {new_relationship} SET r.{reference_property} = keep.id)
+        FOREACH (e IN old_edges | DELETE e)
+        DETACH DELETE duplicate
+        RETURN count(*) AS merged_count
+        """
+        key_query = f"""
+        MATCH (n:{node_type})
+        SET n.normalisedName = {normalised_name_cypher("n.name")}
+        """
+        merged_count = tx.run(rewire_query).single()["merged_count"]
+        tx.run(key_query).consume()
+        return merged_count
+
+    def entity_with_name(self, node_type: str, name: str) -> Optional[str]:
+        # Id of the resolved Subject/Object which the name normalises to, if there is one
+        query = f"MATCH (n:{node_type} {{normalisedName: $normalised_name}}) RETURN n.id AS id"
+        with self.neo4j_ops._get_session() as session:
+            record = session.run(query, normalised_name=normalised_name(name)).single()
+            return record["id"] if record else None
+
+    def entity_properties(self, name: str) -> dict[str, Any]:
+        if self.resolve_entities:
+            return {"name": name, "normalisedName": normalised_name(name)}
+        return {"name": name}
 
     def read_hypothesis(self, hypothesis_id: str) -> Optional[Hypothesis]:
         # Get the relation node
@@ -100,68 +181,50 @@ class HypothesisOperations:
         subject_node, object_node = self._get_connected_nodes(hypothesis.id)
 
         # Handle subject node
-        if subject_node and subject_node["id"] == hypothesis.subject.id:
+        if subject_node and subject_node["id"] == hypothesis.subject.id and not self.resolve_entities:
             # Update existing subject node
             subject_updated = self.neo4j_ops.update_node(
                 node_id=subject_node["id"],
-                properties={
-                    "name": hypothesis.subject.name
-                }
+                properties=self.entity_properties(hypothesis.subject.name)
             )
+        elif subject_node and subject_node["id"] == hypothesis.subject.id:
+            # Resolved entities are shared between hypotheses, so a new name moves only this hypothesis to
+            # whichever entity carries it instead of renaming the entity for all of them
+            with self.neo4j_ops._get_session() as session:
+                hypothesis.subject.id = session.execute_write(
+                    self._link_entity_in, "Subject", hypothesis.subject.name, self.neo4j_ops.id_provider.id(),
+                    hypothesis.id, subject_node["id"])
+            subject_updated = hypothesis.subject.id is not None
         else:
-            # Check if the new subject node exists
-            existing_subject = self.neo4j_ops.read_node(hypothesis.subject.id)
-            if existing_subject:
-                # Use existing subject node
-                subject_id = hypothesis.subject.id
-                subject_updated = True
-            else:
-                # Create new subject node
-                subject_id = self.neo4j_ops.create_node(node_type="Subject", properties={
-                    "name": hypothesis.subject.name,
-                    "id": hypothesis.subject.id
-                })
-                subject_updated = subject_id is not None
-
-            # Update the relationship
-            if subject_node:
-                # Delete old relationship
-                self._delete_relationship(subject_node["id"], hypothesis.id)
-
-            # Create new relationship
-            self._create_relationship(subject_id, hypothesis.id, "FLOWS_TO")
+            # Use (or create) the new subject node and move the relationship to it, in one transaction
+            with self.neo4j_ops._get_session() as session:
+                hypothesis.subject.id = session.execute_write(
+                    self._link_entity_in, "Subject", hypothesis.subject.name, hypothesis.subject.id, hypothesis.id,
+                    subject_node["id"] if subject_node else None)
+            subject_updated = hypothesis.subject.id is not None
 
         # Handle object node
-        if object_node and object_node["id"] == hypothesis.object.id:
+        if object_node and object_node["id"] == hypothesis.object.id and not self.resolve_entities:
             # Update existing object node
             object_updated = self.neo4j_ops.update_node(
                 node_id=object_node["id"],
-                properties={
-                    "name": hypothesis.object.name
-                }
+                properties=self.entity_properties(hypothesis.object.name)
             )
+        elif object_node and object_node["id"] == hypothesis.object.id:
+            # Resolved entities are shared between hypotheses, so a new name moves only this hypothesis to
+            # whichever entity carries it instead of renaming the entity for all of them
+            with self.neo4j_ops._get_session() as session:
+                hypothesis.object.id = session.execute_write(
+                    self._link_entity_in, "Object", hypothesis.object.name, self.neo4j_ops.id_provider.id(),
+                    hypothesis.id, object_node["id"])
+            object_updated = hypothesis.object.id is not None
         else:
-            # Check if the new object node exists
-            existing_object = self.neo4j_ops.read_node(hypothesis.object.id)
-            if existing_object:
-                # Use existing object node
-                object_id = hypothesis.object.id
-                object_updated = True
-            else:
-                # Create new object node
-                object_id = self.neo4j_ops.create_node(node_type="Object", properties={
-                    "name": hypothesis.object.name,
-                    "id": hypothesis.object.id
-                })
-                object_updated = object_id is not None
-
-            # Update the relationship
-            if object_node:
-                # Delete old relationship
-                self._delete_relationship(hypothesis.id, object_node["id"])
-
-            # Create new relationship
-            self._create_relationship(hypothesis.id, object_id, "FLOWS_TO")
+            # Use (or create) the new object node and move the relationship to it, in one transaction
+            with self.neo4j_ops._get_session() as session:
+                hypothesis.object.id = session.execute_write(
+                    self._link_entity_in, "Object", hypothesis.object.name, hypothesis.object.id, hypothesis.id,
+                    object_node["id"] if object_node else None)
+            object_updated = hypothesis.object.id is not None
 
         # Update relation node
         belief_dict = hypothesis.belief.to_dict()
@@ -182,50 +245,41 @@ class HypothesisOperations:
         return subject_updated and object_updated and relation_updated
 
     def delete_hypothesis(self, hypothesis_id: str, keep_subject_object: bool = False) -> bool:
-        # Get the nodes
-        relation_node = self.neo4j_ops.read_node(hypothesis_id)
-        if not relation_node:
-            return False
+        # Relationships, relation node and orphaned subject/object all go in one transaction
+        return hypothesis_id in self.delete_hypotheses([hypothesis_id], keep_subject_object=keep_subject_object)
 
-        subject_node, object_node = self._get_connected_nodes(hypothesis_id)
-
-        # Delete the relationships first (using Cypher query)
-        self._delete_relationships(hypothesis_id)
-
-        # Delete the relation node
-        deleted_relation = self.neo4j_ops.delete_node(hypothesis_id)
-
-        # Delete subject and object nodes if not keeping them
-        if not keep_subject_object:
-            if subject_node:
-                # Check if the subject node is used by other hypotheses
-                subject_used = self._is_node_used_elsewhere(subject_node["id"])
-                if not subject_used:
-                    self.neo4j_ops.delete_node(subject_node["id"])
-
-            if object_node:
-                # Check if the object node is used by other hypotheses
-                object_used = self._is_node_used_elsewhere(object_node["id"])
-                if not object_used:
-                    self.neo4j_ops.delete_node(object_node["id"])
+    def _is_node_used_elsewhere(self, node_id: str, node_type: str) -> bool:
+        query = f"""
+        MATCH (n:{node_type} {{id: $node_id}})
+        RETURN COUNT {{ (n)--() }} AS degree
+        """
 
-        return deleted_relation
+        with self.neo4j_ops._get_session() as session:
+            result = session.run(query, node_id=node_id)
+            record = result.single()
+            return record is not None and record["degree"] > 0
 
-    def _is_node_used_elsewhere(self, node_id: str) -> bool:
+    def collect_orphans(self, batch_size: int = 10000) -> int:
+        # Maintenance pass for Subjects/Objects left behind by bulk deletes with keep_subject_object=True
         query = """
-        MATCH (n {id: $node_id})-[r:FLOWS_TO]->()
-        RETURN count(r) as relationship_count
-        UNION
-        MATCH ()-[r:FLOWS_TO]->(n {id: $node_id})
-        RETURN count(r) as relationship_count
+        CALL {
+            MATCH (n:Subject) WHERE COUNT { (n)--() } = 0 RETURN n
+            UNION
+            MATCH (n:Object) WHERE COUNT { (n)--() } = 0 RETURN n
+        }
+        WITH n LIMIT $batch_size
+        DELETE n
+        RETURN count(*) AS deleted_count
         """
 
+        total_deleted = 0
         with self.neo4j_ops._get_session() as session:
-            result = session.run(query, node_id=node_id)
-            total_count = 0
-            for record in result:
-                total_count += record["relationship_count"]
-            return total_count > 0
+            while True:
+                record = session.run(query, batch_size=batch_size).single()
+                deleted_count = record["deleted_count"] if record else 0
+                total_deleted += deleted_count
+                if deleted_count < batch_size:
+                    return total_deleted
 
     def find_hypotheses(self, subject: str = None, relation: str = None,
                         object_: str = None, min_alpha: int = None,
@@ -239,7 +293,10 @@ class HypothesisOperations:
 
         params = {}
 
-        if subject:
+        if subject and self.resolve_entities:
+            query += " AND s.normalisedName = $subject"
+            params["subject"] = normalised_name(subject)
+        elif subject:
             query += " AND s.name = $subject"
             params["subject"] = subject
 
@@ -251,7 +308,10 @@ class HypothesisOperations:
             query += " AND r.name = $relation"
             params["relation"] = relation
 
-        if object_:
+        if object_ and self.resolve_entities:
+            query += " AND o.normalisedName = $object"
+            params["object"] = normalised_name(object_)
+        elif object_:
             query += " AND o.name = $object"
             params["object"] = object_
 
@@ -280,53 +340,83 @@ class HypothesisOperations:
         # Execute the query
         with self.neo4j_ops._get_session() as session:
             result = session.run(query, **params)
-            hypotheses = []
+            return [self._hypothesis_from_record(record) for record in result]
 
-            for record in result:
-                # Create HypothesisSubject
-                subject_node = dict(record["s"].items())
-                subject = HypothesisSubject(
-                    name=subject_node.get("name", ""),
-                    id=subject_node.get("id", "")
-                )
+    def read_hypotheses(self, hypothesis_ids: list[str]) -> list[Hypothesis]:
+        if not hypothesis_ids:
+            return []
 
-                # Create HypothesisObject
-                object_node = dict(record["o"].items())
-                object_ = HypothesisObject(
-                    name=object_node.get("name", ""),
-                    id=object_node.get("id", "")
-                )
-
-                # Create Hypothesis
-                relation_node = dict(record["r"].items())
-                alpha = relation_node.get("belief_alpha", 1)
-                beta = relation_node.get("belief_beta", 1)
-                belief = BetaBernoulliBelief(alpha=alpha, beta=beta)
-
-                hypothesis = Hypothesis(
-                    subject=subject,
-                    relation=relation_node.get("name", ""),
-                    object=object_,
-                    belief=belief,
-                    id=relation_node.get("id", "")
-                )
-
-                hypotheses.append(hypothesis)
-
-        return hypotheses
-
-    def _create_relationship(self, from_node_id: str, to_node_id: str, relationship_type: str) -> bool:
-        query = f"""
-        MATCH (a), (b)
-        WHERE a.id = $from_id AND b.id = $to_id
-        CREATE (a)-[r:{relationship_type}]->(b)
-        RETURN type(r) as type
+        # Resolve every requested hypothesis in a single round trip, preserving the requested order
+        query = """
+        UNWIND range(0, size($hypothesis_ids) - 1) AS idx
+        MATCH (s:Subject)-[:FLOWS_TO]->(r:Relation {id: $hypothesis_ids[idx]})-[:FLOWS_TO]->(o:Object)
+        RETURN idx, s, r, o
+        ORDER BY idx
         """
 
         with self.neo4j_ops._get_session() as session:
-            result = session.run(query, from_id=from_node_id, to_id=to_node_id)
+            result = session.run(query, hypothesis_ids=hypothesis_ids)
+            return [self._hypothesis_from_record(record) for record in result]
+
+    def delete_hypotheses(self, hypothesis_ids: list[str], keep_subject_object: bool = False) -> list[str]:
+        if not hypothesis_ids:
+            return []
+
+        # Delete all relation nodes and, unless asked to keep them, any Subject/Object
+        # left without relationships, in one statement (and hence one transaction)
+        query = """
+        UNWIND $hypothesis_ids AS hypothesis_id
+        MATCH (r:Relation {id: hypothesis_id})
+        OPTIONAL MATCH (s:Subject)-[:FLOWS_TO]->(r)
+        OPTIONAL MATCH (r)-[:FLOWS_TO]->(o:Object)
+        WITH collect(DISTINCT r) AS relations, collect(DISTINCT s) + collect(DISTINCT o) AS endpoints
+        WITH relations, endpoints, [rel IN relations | rel.id] AS deleted_ids
+        FOREACH (rel IN relations | DETACH DELETE rel)
+        WITH endpoints, deleted_ids
+        CALL {
+            WITH endpoints
+            UNWIND endpoints AS endpoint
+            WITH endpoint
+            WHERE NOT $keep_subject_object AND COUNT { (endpoint)--() } = 0
+            DELETE endpoint
+            RETURN count(*) AS orphans_deleted
+        }
+        RETURN deleted_ids, orphans_deleted
+        """
+
+        with self.neo4j_ops._get_session() as session:
+            result = session.run(query, hypothesis_ids=hypothesis_ids, keep_subject_object=keep_subject_object)
             record = result.single()
-            return record is not None
+            return list(record["deleted_ids"]) if record else []
+
+    def _hypothesis_from_record(self, record) -> Hypothesis:
+        # Create HypothesisSubject
+        subject_node = dict(record["s"].items())
+        subject = HypothesisSubject(
+            name=subject_node.get("name", ""),
+            id=subject_node.get("id", "")
+        )
+
+        # Create HypothesisObject
+        object_node = dict(record["o"].items())
+        object_ = HypothesisObject(
+            name=object_node.get("name", ""),
+            id=object_node.get("id", "")
+        )
+
+        # Create Hypothesis
+        relation_node = dict(record["r"].items())
+        alpha = relation_node.get("belief_alpha", 1)
+        beta = relation_node.get("belief_beta", 1)
+        belief = BetaBernoulliBelief(alpha=alpha, beta=beta)
+
+        return Hypothesis(
+            subject=subject,
+            relation=relation_node.get("name", ""),
+            object=object_,
+            belief=belief,
+            id=relation_node.get("id", "")
+        )
 
     def _get_connected_nodes(self, relation_id: str) -> tuple[Optional[dict[str, Any]], Optional[dict[str, Any]]]:
         query = """
@@ -345,28 +435,3 @@ class HypothesisOperations:
                 return subject_node, object_node
 
             return None, None
-
-    def _delete_relationships(self, relation_id: str) -> bool:
-        query = """
-        MATCH (s)-[r1:FLOWS_TO]->(rel:Relation)-[r2:FLOWS_TO]->(o)
-        WHERE rel.id = $relation_id
-        DELETE r1, r2
-        RETURN count(r1) + count(r2) as deleted_count
-        """
-
-        with self.neo4j_ops._get_session() as session:
-            result = session.run(query, relation_id=relation_id)
-            record = result.single()
-            return record and record["deleted_count"] > 0
-
-    def _delete_relationship(self, from_node_id: str, to_node_id: str) -> bool:
-        query = """
-        MATCH (a {id: $from_id})-[r:FLOWS_TO]->(b {id: $to_id})
-        DELETE r
-        RETURN count(r) as deleted_count
-        """
-
-        with self.neo4j_ops._get_session() as session:
-            result = session.run(query, from_id=from_node_id, to_id=to_node_id)
-            record = result.single()
-            return record and record["deleted_count"] > 0
@@ -1,20 +1,32 @@
 import uuid
+import weakref
 from dataclasses import dataclass, field
-from typing import List, Union
+from typing import Iterator, Optional, TextIO, Union
 
-from dataclasses_json import dataclass_json
+from dataclasses_json import config, dataclass_json
 
 from src.domain.evidence import Evidence
 from src.domain.hypothesis import Hypothesis
 
+REPR_MAX_DEPTH = 2
+REPR_MAX_CHILDREN = 5
+
 
 @dataclass_json
-@dataclass(frozen=False, slots=True, order=True)
+@dataclass(frozen=False, slots=True, unsafe_hash=True, weakref_slot=True)
 class InferenceNode:
-    node: Union[Hypothesis, Evidence]
-    children: list["InferenceNode"] = field(default_factory=list)
+    # Nodes are equal and hash by id only, so list lookups and membership checks never compare subtrees
+    node: Union[Hypothesis, Evidence] = field(compare=False)
+    children: list["InferenceNode"] = field(default_factory=list, compare=False)
+
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
-    id: str = field(default_factory=lambda: str(uuid.uuid4()), compare=False)
+    # Back-pointer and cached sum of the children's aggregation terms, used for incremental posterior propagation.
+    # The parent is held weakly so the tree has no reference cycles and serialisation does not recurse upwards.
+    parent_ref: Optional[weakref.ref] = field(default=None, compare=False, repr=False,
+                                              metadata=config(exclude=lambda _: True))
+    children_terms: Optional[tuple[float, float, float]] = field(default=None, compare=False, repr=False,
+                                                                 metadata=config(exclude=lambda _: True))
 
     def __post_init__(self):
         """Validate the inference node data after initialization."""
@@ -27,23 +39,89 @@ class InferenceNode:
         for child in self.children:
             if not isinstance(child, InferenceNode):
                 raise ValueError("All children must be InferenceNode instances")
+            child.parent_ref = weakref.ref(self)
 
     def __repr__(self) -> str:
-        return f"InferenceNode(type={type(self.node)}, content={self.node}, children={str(self.children)})"
+        # Bounded, so printing a node never renders a whole large tree
+        return f"InferenceNode(\n{self.as_tree(max_depth=REPR_MAX_DEPTH, max_children=REPR_MAX_CHILDREN)})"
 
     def __str__(self):
-        return f"InferenceNode(type={type(self.node)}, content={self.node}, children={str(self.children)})"
+        return self.__repr__()
 
     def add_all(self, children):
+        for child in children:
+            child.parent_ref = weakref.ref(self)
         self.children += children
+        self.children_terms = None
 
-    def as_tree(self, level: int = 0) -> str:
-        formatted = ""
-        spaces = (level - 1) * " "
-        formatted += f"{spaces}{'└-' if level > 0 else ""}{self.node.as_tree()}\n"
-        for child in self.children:
-            formatted += child.as_tree(level + 1)
-        return formatted
+    @property
+    def parent(self) -> Optional["InferenceNode"]:
+        return self.parent_ref() if self.parent_ref is not None else None
+
+    def ancestors(self):
+        ancestor = self.parent
+        while ancestor is not None:
+            yield ancestor
+            ancestor = ancestor.parent
+
+    def traverse(self, order: str = "pre_order"):
+        # Resumable iterator over this subtree, see TreeTraversal
+        from src.domain.tree_traversal import TreeTraversal
+        return TreeTraversal.start(self, order)
+
+    def contribution(self) -> float:
+        if isinstance(self.node, Evidence):
+            return self.node.contribution_to_hypothesis
+        return self.node.contribution_to_root
+
+    def prune(self, min_path_contribution: float) -> int:
+        # Drops subtrees whose product of contributions down from this node is below the threshold, so no
+        # evidence gathering is spent on them. The strongest child of a node is always kept.
+        pruned_count = 0
+        pending = [(self, 1.0)]
+        while pending:
+            inference_node, path_contribution = pending.pop()
+            if not inference_node.children:
+                continue
+            strongest = max(inference_node.children, key=lambda child: child.contribution())
+            kept = [child for child in inference_node.children
+                    if child is strongest or path_contribution * child.contribution() >= min_path_contribution]
+            pruned_count += len(inference_node.children) - len(kept)
+            if len(kept) != len(inference_node.children):
+                inference_node.children = kept
+                inference_node.children_terms = None
+            pending.extend((child, path_contribution * child.contribution()) for child in kept)
+        return pruned_count
+
+    def tree_lines(self, max_depth: Optional[int] = None, max_children: Optional[int] = None) -> Iterator[str]:
+        # One line per node in a single pre-order pass. Children below max_depth, and those after the first
+        # max_children of a node, are elided into a single summary line.
+        pending = [(self, 0)]
+        while pending:
+            inference_node, level = pending.pop()
+            if isinstance(inference_node, int):
+                # Placeholder entry for a number of elided children
+                yield f"{(level - 1) * " "}└-... {inference_node} not shown"
+                continue
+            yield f"{(level - 1) * " "}{'└-' if level > 0 else ""}{inference_node.node.as_tree()}"
+            children = inference_node.children
+            if not children:
+                continue
+            if max_depth is not None and level >= max_depth:
+                pending.append((len(children), level + 1))
+                continue
+            shown = children if max_children is None else children[:max_children]
+            if len(shown) < len(children):
+                pending.append((len(children) - len(shown), level + 1))
+            pending.extend((child, level + 1) for child in reversed(shown))
+
+    def write_tree(self, stream: TextIO, max_depth: Optional[int] = None, max_children: Optional[int] = None) -> None:
+        for line in self.tree_lines(max_depth, max_children):
+            stream.write(line)
+            stream.write("\n")
+
+    def as_tree(self, max_depth: Optional[int] = None, max_children: Optional[int] = None) -> str:
+        return "".join(f"{line}\n" for line in self.tree_lines(max_depth, max_children))
 
     def just_str(self):
         return str(self.node)
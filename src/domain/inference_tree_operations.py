@@ -0,0 +1,197 @@
+from typing import Optional, Any
+
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.evidence import Evidence
+from src.domain.hypothesis import Hypothesis
+from src.domain.hypothesis_object import HypothesisObject
+from src.domain.hypothesis_subject import HypothesisSubject
+from src.domain.induction_node import InferenceNode
+from src.domain.neo4j_operations import Neo4jOperations
+
+HYPOTHESIS_KIND = "Hypothesis"
+EVIDENCE_KIND = "Evidence"
+
+
+class InferenceTreeOperations:
+    """
+    Stores InferenceNode trees as (:InferenceNode:Hypothesis) and (:InferenceNode:Evidence) nodes linked
+    by ordered HAS_CHILD edges. The properties last written for every node are remembered, so save_tree()
+    only writes the nodes which changed since the previous save or load.
+    """
+
+    def __init__(self, neo4j_ops: Neo4jOperations):
+        self.neo4j_ops = neo4j_ops
+        self.saved_rows: dict[str, dict[str, Any]] = {}
+        self.saved_tree_ids: dict[str, set[str]] = {}
+
+    def create_constraints(self) -> None:
+        with self.neo4j_ops._get_session() as session:
+            session.run("""
+            CREATE CONSTRAINT inference_node_id IF NOT EXISTS
+            FOR (n:InferenceNode) REQUIRE n.id IS UNIQUE
+            """)
+
+    def save_tree(self, root: InferenceNode, with_structure: bool = True) -> int:
+        # Without the structure, only node properties (beliefs) are written: nodes missing from the tree, e.g.
+        # pruned for one validation, stay saved, and existing edges keep their positions
+        rows = tree_rows(root)
+        current_ids = {row["id"] for row in rows}
+        if with_structure:
+            dirty_rows = [row for row in rows if self.saved_rows.get(row["id"]) != row]
+            edge_rows = dirty_rows
+            removed_ids = list(self.saved_tree_ids.get(root.id, set()) - current_ids)
+        else:
+            dirty_rows = [row for row in rows if row["id"] not in self.saved_rows
+                          or self.saved_rows[row["id"]]["properties"] != row["properties"]]
+            edge_rows = [row for row in dirty_rows if row["id"] not in self.saved_rows]
+            removed_ids = []
+        if not dirty_rows and not removed_ids:
+            return 0
+
+        upsert_query = """
+        UNWIND $rows AS row
+        MERGE (n:InferenceNode {{id: row.id}})
+        SET n:{kind}, n += row.properties, n.rootId = row.root_id, n.savedAt = timestamp()
+        """
+        # Re-point each dirty node's incoming edge, since it may have been added to or moved within a tree
+        edge_query = """
+        UNWIND $rows AS row
+        MATCH (n:InferenceNode {id: row.id})
+        OPTIONAL MATCH (:InferenceNode)-[old:HAS_CHILD]->(n)
+        WITH n, row, collect(old) AS old_edges
+        FOREACH (e IN old_edges | DELETE e)
+        WITH n, row
+        WHERE row.parent_id IS NOT NULL
+        MATCH (parent:InferenceNode {id: row.parent_id})
+        CREATE (parent)-[:HAS_CHILD {index: row.child_index}]->(n)
+        """
+        delete_query = """
+        UNWIND $removed_ids AS removed_id
+        MATCH (n:InferenceNode {id: removed_id})
+        DETACH DELETE n
+        """
+
+        with self.neo4j_ops._get_session() as session:
+            with session.begin_transaction() as tx:
+                for kind in [HYPOTHESIS_KIND, EVIDENCE_KIND]:
+                    kind_rows = [row for row in dirty_rows if row["kind"] == kind]
+                    if kind_rows:
+                        tx.run(upsert_query.format(kind=kind), rows=kind_rows).consume()
+                if edge_rows:
+                    tx.run(edge_query, rows=edge_rows).consume()
+                if removed_ids:
+                    tx.run(delete_query, removed_ids=removed_ids).consume()
+                tx.commit()
+
+        for row in dirty_rows:
+            saved_row = self.saved_rows.get(row["id"])
+            self.saved_rows[row["id"]] = row if with_structure or saved_row is None \
+                else {**saved_row, "properties": row["properties"]}
+        for removed_id in removed_ids:
+            self.saved_rows.pop(removed_id, None)
+        self.saved_tree_ids[root.id] = current_ids if with_structure \
+            else self.saved_tree_ids.get(root.id, set()) | current_ids
+        return len(dirty_rows) + len(removed_ids)
+
+    def load_tree(self, root_id: str) -> Optional[InferenceNode]:
+        # The root and all its descendants, each with its parent and position, in a single round trip
+        query = """
+        MATCH (root:InferenceNode {id: $root_id})-[:HAS_CHILD*0..]->(n:InferenceNode)
+        OPTIONAL MATCH (parent:InferenceNode)-[e:HAS_CHILD]->(n)
+        RETURN n, labels(n) AS labels, CASE WHEN n.id = $root_id THEN null ELSE parent.id END AS parent_id,
+               e.index AS child_index
+        """
+
+        with self.neo4j_ops._get_session() as session:
+            records = list(session.run(query, root_id=root_id))
+        if not records:
+            return None
+
+        inference_nodes: dict[str, InferenceNode] = {}
+        placements = []
+        for record in records:
+            properties = dict(record["n"].items())
+            inference_nodes[properties["id"]] = as_inference_node(properties, record["labels"])
+            if record["parent_id"] is not None:
+                placements.append((record["parent_id"], record["child_index"], properties["id"]))
+
+        for parent_id, _, child_id in sorted(placements, key=lambda placement: placement[1]):
+            inference_nodes[parent_id].add_all([inference_nodes[child_id]])
+
+        root = inference_nodes[root_id]
+        for row in tree_rows(root):
+            self.saved_rows[row["id"]] = row
+        self.saved_tree_ids[root_id] = set(inference_nodes)
+        return root
+
+    def find_tree_root(self, subject: str, relation: str, object_: str) -> Optional[str]:
+        # Most recently saved tree whose root states the given hypothesis
+        query = """
+        MATCH (root:InferenceNode:Hypothesis {subject: $subject, relation: $relation, object: $object})
+        WHERE root.rootId = root.id
+        RETURN root.id AS id
+        ORDER BY root.savedAt DESC
+        LIMIT 1
+        """
+
+        with self.neo4j_ops._get_session() as session:
+            record = session.run(query, subject=subject, relation=relation, object=object_).single()
+            return record["id"] if record else None
+
+    def delete_tree(self, root_id: str) -> int:
+        query = """
+        MATCH (n:InferenceNode {rootId: $root_id})
+        DETACH DELETE n
+        RETURN count(n) AS deleted_count
+        """
+
+        with self.neo4j_ops._get_session() as session:
+            record = session.run(query, root_id=root_id).single()
+        for node_id in self.saved_tree_ids.pop(root_id, set()):
+            self.saved_rows.pop(node_id, None)
+        return record["deleted_count"] if record else 0
+
+
+def tree_rows(root: InferenceNode) -> list[dict[str, Any]]:
+    rows = []
+    pending = [(root, None, None)]
+    while pending:
+        inference_node, parent_id, child_index = pending.pop()
+        rows.append(as_row(inference_node, root.id, parent_id, child_index))
+        pending.extend((child, inference_node.id, index) for index, child in enumerate(inference_node.children))
+    return rows
+
+
+def as_row(inference_node: InferenceNode, root_id: str, parent_id: Optional[str],
+           child_index: Optional[int]) -> dict[str, Any]:
+    node = inference_node.node
+    properties = {
+        "nodeId": node.id,
+        "contribution": inference_node.contribution(),
+        "belief_alpha": node.belief.alpha,
+        "belief_beta": node.belief.beta,
+    }
+    if isinstance(node, Hypothesis):
+        properties.update({"subject": node.subject.name, "relation": node.relation, "object": node.object.name})
+    else:
+        properties["description"] = node.evidence_description
+    return {
+        "id": inference_node.id,
+        "kind": HYPOTHESIS_KIND if isinstance(node, Hypothesis) else EVIDENCE_KIND,
+        "root_id": root_id,
+        "parent_id": parent_id,
+        "child_index": child_index,
+        "properties": properties,
+    }
+
+
+def as_inference_node(properties: dict[str, Any], labels: list[str]) -> InferenceNode:
+    belief = BetaBernoulliBelief(alpha=properties.get("belief_alpha", 1), beta=properties.get("belief_beta", 1))
+    if HYPOTHESIS_KIND in labels:
+        node = Hypothesis(HypothesisSubject(properties["subject"]), properties["relation"],
+                          HypothesisObject(properties["object"]), belief=belief,
+                          contribution_to_root=properties.get("contribution", 0.0), id=properties["nodeId"])
+    else:
+        node = Evidence(properties["description"], contribution_to_hypothesis=properties.get("contribution", 0.0),
+                        belief=belief, id=properties["nodeId"])
+    return InferenceNode(node, [], id=properties["id"])
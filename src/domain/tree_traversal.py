@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Iterator, Optional, Self
+
+from src.domain.induction_node import InferenceNode
+
+PRE_ORDER = "pre_order"
+POST_ORDER = "post_order"
+LEVEL_ORDER = "level_order"
+
+NOT_YET_VISITED = -1
+
+
+class TreeTraversal(Iterator[InferenceNode]):
+    """
+    Resumable iterator over an InferenceNode tree. Its whole position is a list of (node, int) frames, which
+    can be stored in graph state between hops and resumed with TreeTraversal(order, frames):
+    - pre-order and post-order: the path from the root, each node with the index of its next child to descend
+      into (NOT_YET_VISITED for a node which has not been yielded yet); in pre-order the last node yielded is
+      frames[-1][0] and its parent is frames[-2][0]
+    - level-order: the queue of nodes still to be yielded, each with its depth
+    Children are read when a node is descended into, not when the traversal starts, so nodes may be added to
+    the part of the tree not yet reached. Each step is amortised constant work.
+    """
+
+    def __init__(self, order: str, frames: list[tuple[InferenceNode, int]]):
+        if order not in (PRE_ORDER, POST_ORDER, LEVEL_ORDER):
+            raise ValueError(f"Unknown traversal order '{order}'")
+        self.order = order
+        self.frames = deque(frames) if order == LEVEL_ORDER else frames
+
+    @classmethod
+    def start(cls, root: InferenceNode, order: str = PRE_ORDER) -> Self:
+        return cls(order, [(root, NOT_YET_VISITED if order != LEVEL_ORDER else 0)])
+
+    @classmethod
+    def at(cls, inference_node: InferenceNode) -> Self:
+        # Pre-order traversal positioned as if it had just yielded inference_node, continuing with its subtree
+        # and then its later siblings. The path is found through the parent links.
+        frames = [(inference_node, 0)]
+        child = inference_node
+        for ancestor in child.ancestors():
+            frames.append((ancestor, next(index for index, sibling in enumerate(ancestor.children)
+                                          if sibling is child) + 1))
+            child = ancestor
+        frames.reverse()
+        return cls(PRE_ORDER, frames)
+
+    def checkpoint(self) -> list[tuple[InferenceNode, int]]:
+        return list(self.frames)
+
+    def current(self) -> Optional[InferenceNode]:
+        # The node last yielded by a pre-order traversal
+        return self.frames[-1][0] if self.frames else None
+
+    def __iter__(self) -> Self:
+        return self
+
+    def __next__(self) -> InferenceNode:
+        if self.order == PRE_ORDER:
+            return self._next_pre_order()
+        if self.order == POST_ORDER:
+            return self._next_post_order()
+        return self._next_level_order()
+
+    def _next_pre_order(self) -> InferenceNode:
+        frames = self.frames
+        while frames:
+            inference_node, next_child = frames[-1]
+            if next_child == NOT_YET_VISITED:
+                frames[-1] = (inference_node, 0)
+                return inference_node
+            if next_child < len(inference_node.children):
+                frames[-1] = (inference_node, next_child + 1)
+                child = inference_node.children[next_child]
+                frames.append((child, 0))
+                return child
+            frames.pop()
+        raise StopIteration
+
+    def _next_post_order(self) -> InferenceNode:
+        frames = self.frames
+        while frames:
+            inference_node, next_child = frames[-1]
+            next_child = max(next_child, 0)
+            if next_child < len(inference_node.children):
+                frames[-1] = (inference_node, next_child + 1)
+                frames.append((inference_node.children[next_child], NOT_YET_VISITED))
+                continue
+            frames.pop()
+            return inference_node
+        raise StopIteration
+
+    def _next_level_order(self) -> InferenceNode:
+        if not self.frames:
+            raise StopIteration
+        inference_node, depth = self.frames.popleft()
+        self.frames.extend((child, depth + 1) for child in inference_node.children)
+        return inference_node
@@ -1,21 +1,15 @@
-import spacy
 from markdown_it import MarkdownIt
 from mdit_py_plugins.footnote import footnote_plugin
 from mdit_py_plugins.front_matter import front_matter_plugin
 
-nlp = spacy.load("en_core_web_sm")
-doc = nlp("""
+from src.embedding.embedding_models import spacy_model
+
+sentence = """
 This is a sentence. It contains 3 components:
 1) Technique
 2) Skill
 3) Luck
-""")
-print([(w.text, w.pos_) for w in doc])
-
-md = (MarkdownIt('commonmark', {'breaks': True, 'html': True})
-    .use(front_matter_plugin)
-    .use(footnote_plugin)
-    .enable('table'))
+"""
 
 text = """
 Section 1
@@ -35,5 +29,21 @@ Tools:
 List the names of the sections in the above piece of text. Be very brief.
 """
 
-tokens = md.parse(text)
-print(tokens)
+
+def main():
+    # Loaded on first use through the shared registry, not when this module is imported
+    nlp = spacy_model("en_core_web_sm")
+    doc = nlp(sentence)
+    print([(w.text, w.pos_) for w in doc])
+
+    md = (MarkdownIt('commonmark', {'breaks': True, 'html': True})
+        .use(front_matter_plugin)
+        .use(footnote_plugin)
+        .enable('table'))
+
+    tokens = md.parse(text)
+    print(tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import threading
+from typing import Optional, Protocol
+
+import numpy as np
+
+CODE_INDEX_SEARCH = "CODE_INDEX_SEARCH"
+CODE_INDEX_ANN_MIN_ROWS = "CODE_INDEX_ANN_MIN_ROWS"
+IVF_LISTS = "IVF_LISTS"
+IVF_PROBES = "IVF_PROBES"
+HNSW_M = "HNSW_M"
+HNSW_EF_CONSTRUCTION = "HNSW_EF_CONSTRUCTION"
+HNSW_EF_SEARCH = "HNSW_EF_SEARCH"
+
+EXACT_SEARCH = "exact"
+IVF_FLAT_SEARCH = "ivf_flat"
+HNSW_SEARCH = "hnsw"
+
+# Rows scored (or assigned to lists) per block, so float16 stores are widened a block at a time
+BLOCK_ROWS = 65536
+
+
+def block_scores(vectors: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    query_vector = query_vector.astype(np.float32)
+    if not len(vectors):
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate([vectors[start:start + BLOCK_ROWS].astype(np.float32, copy=False) @ query_vector
+                           for start in range(0, len(vectors), BLOCK_ROWS)])
+
+
+def top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[int, float]]:
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k == 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return [(int(rows[index]), float(scores[index])) for index in best]
+
+
+class SearchBackend(Protocol):
+    """Finds the k live rows with the largest inner product with a unit-length query."""
+
+    def nearest(self, vectors: np.ndarray, live: np.ndarray, query_vector: np.ndarray,
+                k: int) -> list[tuple[int, float]]:
+        ...
+
+
+class ExactSearch(SearchBackend):
+    # Brute force: one matrix-vector product over every row
+    def nearest(self, vectors: np.ndarray, live: np.ndarray, query_vector: np.ndarray,
+                k: int) -> list[tuple[int, float]]:
+        scores = block_scores(vectors, query_vector)
+        scores[~live] = -np.inf
+        return top_k(np.arange(len(scores)), scores, k)
+
+
+def same_store(vectors: np.ndarray, indexed_vectors: Optional[np.ndarray]) -> bool:
+    # Refreshes only append to the vector file, so an index over its first rows stays valid; compaction writes a
+    # new file and renumbers the rows
+    return (indexed_vectors is not None and getattr(vectors, "filename", None) is not None
+            and getattr(vectors, "filename", None) == getattr(indexed_vectors, "filename", None)
+            and len(vectors) >= len(indexed_vectors))
+
+
+class IvfFlatSearch(SearchBackend):
+    """
+    Inverted file over a spherical k-means coarse quantiser: rows are grouped by their nearest of n_lists
+    centroids, and a query scores exactly only the rows in its n_probes nearest lists. Rows appended by a refresh
+    are assigned to the existing centroids; the quantiser is retrained after a compaction.
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, n_probes: int = 8, iterations: int = 10,
+                 training_rows_per_list: int = 64, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probes = n_probes
+        self.iterations = iterations
+        self.training_rows_per_list = training_rows_per_list
+        self.random = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.indexed_vectors: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.list_rows = np.zeros(0, dtype=np.int64)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+
+    def nearest_centroids(self, rows: np.ndarray) -> np.ndarray:
+        return np.argmax(rows.astype(np.float32, copy=False) @ self.centroids.T, axis=1).astype(np.int32)
+
+    def assign(self, vectors: np.ndarray, start: int) -> np.ndarray:
+        return np.concatenate([self.nearest_centroids(vectors[block:block + BLOCK_ROWS])
+                               for block in range(start, len(vectors), BLOCK_ROWS)]) \
+            if start < len(vectors) else np.zeros(0, dtype=np.int32)
+
+    def train(self, vectors: np.ndarray) -> None:
+        n_lists = min(self.n_lists or max(1, int(4 * np.sqrt(len(vectors)))), len(vectors))
+        sample_size = min(len(vectors), n_lists * self.training_rows_per_list)
+        sample = np.asarray(vectors[np.sort(self.random.choice(len(vectors), sample_size, replace=False))],
+                            dtype=np.float32)
+        self.centroids = sample[self.random.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignments = self.nearest_centroids(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Lists which lost all their rows are re-seeded from random training rows
+            empty = counts == 0
+            sums[empty] = sample[self.random.choice(sample_size, int(empty.sum()))]
+            self.centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+    def update(self, vectors: np.ndarray) -> None:
+        if vectors is self.indexed_vectors:
+            return
+        if same_store(vectors, self.indexed_vectors) and self.centroids is not None:
+            new_assignments = self.assign(vectors, len(self.assignments))
+            self.assignments = np.concatenate([self.assignments, new_assignments])
+        else:
+            self.train(vectors)
+            self.assignments = self.assign(vectors, 0)
+        self.list_rows = np.argsort(self.assignments, kind="stable")
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.assignments,
+                                                                       minlength=len(self.centroids)))])
+        self.indexed_vectors = vectors
+
+    def nearest(self, vectors: np.ndarray, live: np.ndarray, query_vector: np.ndarray,
+                k: int) -> list[tuple[int, float]]:
+        if not len(vectors):
+            return []
+        with self.lock:
+            self.update(vectors)
+            centroids, list_rows, list_offsets = self.centroids, self.list_rows, self.list_offsets
+        centroid_scores = centroids @ query_vector.astype(np.float32)
+        n_probes = min(self.n_probes, len(centroids))
+        probed = np.argpartition(-centroid_scores, n_probes - 1)[:n_probes]
+        rows = np.sort(np.concatenate([list_rows[list_offsets[probe]:list_offsets[probe + 1]] for probe in probed]))
+        scores = block_scores(vectors[rows], query_vector)
+        scores[~live[rows]] = -np.inf
+        return top_k(rows, scores, k)
+
+
+class HnswSearch(SearchBackend):
+    """
+    Hierarchical navigable small world graph from the optional hnswlib package (pip install hnswlib). Appended
+    rows are added to the graph and tombstoned rows are marked deleted; the graph is rebuilt after a compaction.
+    """
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("HNSW search needs the hnswlib package: pip install hnswlib") from e
+        self.hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.lock = threading.Lock()
+        self.graph = None
+        self.indexed_vectors: Optional[np.ndarray] = None
+        self.deleted: set[int] = set()
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        self.graph.resize_index(len(vectors))
+        for block in range(start, len(vectors), BLOCK_ROWS):
+            rows = vectors[block:block + BLOCK_ROWS].astype(np.float32)
+            self.graph.add_items(rows, np.arange(block, block + len(rows)))
+
+    def update(self, vectors: np.ndarray, live: np.ndarray) -> None:
+        if vectors is not self.indexed_vectors:
+            if same_store(vectors, self.indexed_vectors) and self.graph is not None:
+                self.add(vectors, self.graph.get_current_count())
+            else:
+                self.graph = self.hnswlib.Index(space="ip", dim=vectors.shape[1])
+                self.graph.init_index(max_elements=len(vectors), ef_construction=self.ef_construction, M=self.m)
+                self.deleted = set()
+                self.add(vectors, 0)
+            self.indexed_vectors = vectors
+        for row in np.flatnonzero(~live):
+            if int(row) not in self.deleted:
+                self.graph.mark_deleted(int(row))
+                self.deleted.add(int(row))
+
+    def nearest(self, vectors: np.ndarray, live: np.ndarray, query_vector: np.ndarray,
+                k: int) -> list[tuple[int, float]]:
+        k = min(k, int(live.sum()))
+        if k == 0:
+            return []
+        with self.lock:
+            self.update(vectors, live)
+            self.graph.set_ef(max(self.ef_search, k))
+            labels, distances = self.graph.knn_query(query_vector.astype(np.float32), k=k)
+        # Inner product distance is 1 - similarity
+        return [(int(row), float(1 - distance)) for row, distance in zip(labels[0], distances[0])]
+
+
+def search_backend_from_env() -> SearchBackend:
+    backend = os.environ.get(CODE_INDEX_SEARCH, EXACT_SEARCH)
+    if backend == IVF_FLAT_SEARCH:
+        n_lists = os.environ.get(IVF_LISTS)
+        return IvfFlatSearch(int(n_lists) if n_lists else None, int(os.environ.get(IVF_PROBES, "8")))
+    if backend == HNSW_SEARCH:
+        return HnswSearch(int(os.environ.get(HNSW_M, "16")), int(os.environ.get(HNSW_EF_CONSTRUCTION, "200")),
+                          int(os.environ.get(HNSW_EF_SEARCH, "64")))
+    if backend == EXACT_SEARCH:
+        return ExactSearch()
+    raise ValueError(f"Unknown code index search '{backend}', expected one of "
+                     f"{[EXACT_SEARCH, IVF_FLAT_SEARCH, HNSW_SEARCH]}")
+
+
+def ann_min_rows_from_env() -> int:
+    # Below this many rows, brute force is both exact and fast enough
+    return int(os.environ.get(CODE_INDEX_ANN_MIN_ROWS, "100000"))
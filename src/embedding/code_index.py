@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src.embedding.ann import SearchBackend, ExactSearch, BLOCK_ROWS, search_backend_from_env, ann_min_rows_from_env
+from src.embedding.embedding_models import encode, QUERY_PROMPT, PASSAGE_PROMPT
+
+INDEX_FILE = "index.json"
+
+# Mainframe members are often exported without an extension
+HLASM_SUFFIXES = {"", ".asm", ".hlasm", ".mac", ".s", ".txt"}
+MAX_CHUNK_LINES = 80
+# Compact once this fraction of the stored rows are tombstones
+COMPACTION_THRESHOLD = 0.25
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@dataclass
+class CodeChunk:
+    path: str
+    section: str
+    start_line: int
+    end_line: int
+    text: str
+    content_hash: str = ""
+    # Tombstoned: the chunk is gone from the codebase, but its row stays in the vector file until compaction
+    deleted: bool = False
+
+    def __post_init__(self):
+        if not self.content_hash:
+            self.content_hash = content_hash(self.text)
+
+
+def is_section_start(line: str) -> bool:
+    # HLASM: a name in column 1 labels a section (CSECT, DSECT, routine entry, ...); '*' and '.*' are comments
+    return bool(line) and not line[0].isspace() and not line.startswith("*") and not line.startswith(".*")
+
+
+def section_chunks(path: str, source: str, max_lines: int = MAX_CHUNK_LINES) -> Iterator[CodeChunk]:
+    """Splits a source file at every labelled line; sections longer than max_lines are split further."""
+    lines = source.splitlines()
+    starts = [index for index, line in enumerate(lines) if is_section_start(line)]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    for section_start, section_end in zip(starts, starts[1:] + [len(lines)]):
+        label = lines[section_start].split()[0] if is_section_start(lines[section_start]) else Path(path).stem
+        for chunk_start in range(section_start, section_end, max_lines):
+            chunk_end = min(chunk_start + max_lines, section_end)
+            text = "\n".join(lines[chunk_start:chunk_end])
+            if text.strip():
+                yield CodeChunk(path, label, chunk_start + 1, chunk_end, text)
+
+
+def codebase_chunks(codebase_path: str, max_lines: int = MAX_CHUNK_LINES) -> list[CodeChunk]:
+    root = Path(codebase_path)
+    files = [root] if root.is_file() else sorted(file for file in root.rglob("*")
+                                                   if file.is_file() and file.suffix.lower() in HLASM_SUFFIXES)
+    return [chunk for file in files
+            for chunk in section_chunks(str(file.relative_to(root) if file != root else file.name),
+                                        file.read_text(errors="replace"), max_lines)]
+
+
+def encode_in_batches(texts: list[str], batch_size: int) -> Iterator[np.ndarray]:
+    for start in range(0, len(texts), batch_size):
+        yield encode(texts[start:start + batch_size], PASSAGE_PROMPT, batch_size)
+
+
+@dataclass
+class IndexSnapshot:
+    # Everything a query reads, swapped as one object so refreshes and compactions never show a torn index
+    vectors: np.ndarray
+    chunks: list[CodeChunk]
+    live: np.ndarray
+
+
+@dataclass
+class RefreshStats:
+    added: int = 0
+    kept: int = 0
+    deleted: int = 0
+    compacting: bool = False
+
+
+class CodeEmbeddingIndex:
+    """
+    Unit-length embeddings of code chunks in a memory-mapped raw float32/float16 file, row i describing chunks[i]
+    in the index.json side table. A query is one matrix-vector product over the rows and an argpartition for the
+    top k, so only the rows' pages are touched and nothing but the scores is held in memory. Indexes of at least
+    ann_min_rows rows can be served by an approximate backend instead (IVF-flat or HNSW, see ann.py).
+
+    The index is refreshed incrementally: chunks are matched by content hash, only new or changed ones are
+    encoded and appended, and removed ones are tombstoned. Once tombstones pass COMPACTION_THRESHOLD, the live
+    rows are copied to a new vector file on a background thread. index.json names the vector file and row count
+    and is replaced atomically, so readers never see rows that are still being written.
+    """
+
+    def __init__(self, index_dir: str, backend: Optional[SearchBackend] = None, ann_min_rows: int = 0):
+        self.index_dir = Path(index_dir)
+        self.backend = backend if backend is not None else ExactSearch()
+        self.ann_min_rows = ann_min_rows
+        self.exact = ExactSearch()
+        self.lock = threading.Lock()
+        self.loaded_mtime: Optional[float] = None
+        self.dtype = "float16"
+        self.dimension: Optional[int] = None
+        self.vectors_file: Optional[str] = None
+        self.generation = 0
+        self.snapshot = IndexSnapshot(np.zeros((0, 0), dtype=np.float32), [], np.zeros(0, dtype=bool))
+        if (self.index_dir / INDEX_FILE).exists():
+            self.load()
+
+    @property
+    def chunks(self) -> list[CodeChunk]:
+        return self.snapshot.chunks
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.snapshot.vectors
+
+    @staticmethod
+    def build(index_dir: str, chunks: list[CodeChunk], dtype: str = "float16",
+              batch_size: int = 64) -> "CodeEmbeddingIndex":
+        if not chunks:
+            raise ValueError("No code chunks to index")
+        index = CodeEmbeddingIndex(index_dir)
+        if index.vectors_file is None:
+            index.dtype = dtype
+        index.refresh(chunks, batch_size)
+        return index
+
+    def load(self) -> None:
+        index_path = self.index_dir / INDEX_FILE
+        self.loaded_mtime = index_path.stat().st_mtime
+        with open(index_path) as index_file:
+            metadata = json.load(index_file)
+        self.dtype, self.dimension = metadata["dtype"], metadata["dimension"]
+        self.vectors_file, self.generation = metadata["vectors_file"], metadata["generation"]
+        chunks = [CodeChunk(**chunk) for chunk in metadata["chunks"]]
+        vectors = np.memmap(self.index_dir / self.vectors_file, dtype=self.dtype, mode="r",
+                            shape=(len(chunks), self.dimension)) if chunks else np.zeros((0, 0), dtype=np.float32)
+        self.snapshot = IndexSnapshot(vectors, chunks, np.array([not chunk.deleted for chunk in chunks], dtype=bool))
+
+    def reload_if_changed(self) -> None:
+        # For long-lived readers (the MCP server) of an index refreshed by another process
+        index_path = self.index_dir / INDEX_FILE
+        if index_path.exists() and index_path.stat().st_mtime != self.loaded_mtime:
+            self.load()
+
+    def save(self, chunks: list[CodeChunk]) -> None:
+        temporary_path = self.index_dir / f"{INDEX_FILE}.tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump({"dtype": self.dtype, "dimension": self.dimension, "vectors_file": self.vectors_file,
+                       "generation": self.generation, "chunks": [asdict(chunk) for chunk in chunks]}, index_file)
+        os.replace(temporary_path, self.index_dir / INDEX_FILE)
+        self.load()
+
+    def refresh(self, chunks: list[CodeChunk], batch_size: int = 64) -> RefreshStats:
+        """Brings the index in line with the codebase's current chunks, encoding only what changed."""
+        with self.lock:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            stats = RefreshStats()
+            table = list(self.snapshot.chunks)
+            live_rows_by_hash: dict[str, list[int]] = {}
+            for row, chunk in enumerate(table):
+                if not chunk.deleted:
+                    live_rows_by_hash.setdefault(chunk.content_hash, []).append(row)
+
+            new_chunks = []
+            for chunk in chunks:
+                rows = live_rows_by_hash.get(chunk.content_hash)
+                if rows:
+                    # Same text, possibly moved: keep the vector, take the new location
+                    table[rows.pop()] = chunk
+                    stats.kept += 1
+                else:
+                    new_chunks.append(chunk)
+            for rows in live_rows_by_hash.values():
+                for row in rows:
+                    table[row] = replace(table[row], deleted=True)
+                    stats.deleted += 1
+
+            if new_chunks:
+                if self.vectors_file is None:
+                    self.vectors_file = f"vectors-{self.generation}.bin"
+                with open(self.index_dir / self.vectors_file, "r+b" if table else "wb") as vectors_file:
+                    # Rows past the saved count are leftovers of an interrupted refresh; overwrite them
+                    if table:
+                        vectors_file.seek(len(table) * self.dimension * np.dtype(self.dtype).itemsize)
+                    for batch in encode_in_batches([chunk.text for chunk in new_chunks], batch_size):
+                        self.dimension = batch.shape[1]
+                        vectors_file.write(np.ascontiguousarray(batch, dtype=self.dtype).tobytes())
+                    vectors_file.truncate()
+                table.extend(new_chunks)
+                stats.added = len(new_chunks)
+            if stats.added or stats.deleted or table != self.snapshot.chunks:
+                self.save(table)
+
+        if self.tombstone_fraction() > COMPACTION_THRESHOLD:
+            stats.compacting = True
+            self.compact_in_background()
+        return stats
+
+    def tombstone_fraction(self) -> float:
+        live = self.snapshot.live
+        return 1 - live.sum() / len(live) if len(live) else 0.0
+
+    def compact(self) -> None:
+        """Copies the live rows to a new vector file and drops the tombstones."""
+        with self.lock:
+            snapshot = self.snapshot
+            live_rows = np.flatnonzero(snapshot.live)
+            if len(live_rows) == len(snapshot.chunks):
+                return
+            previous_file = self.vectors_file
+            self.generation += 1
+            self.vectors_file = f"vectors-{self.generation}.bin"
+            with open(self.index_dir / self.vectors_file, "wb") as vectors_file:
+                for start in range(0, len(live_rows), BLOCK_ROWS):
+                    rows = live_rows[start:start + BLOCK_ROWS]
+                    vectors_file.write(np.ascontiguousarray(snapshot.vectors[rows]).tobytes())
+            self.save([snapshot.chunks[row] for row in live_rows])
+            if previous_file is not None:
+                try:
+                    # Readers still mapping the old file keep their mapping
+                    os.remove(self.index_dir / previous_file)
+                except OSError as e:
+                    print(f"Could not remove compacted vector file {previous_file}: {e}")
+
+    def compact_in_background(self) -> threading.Thread:
+        # Not a daemon: a refresh run from the command line still finishes compacting before exiting
+        compaction = threading.Thread(target=self.compact, name="code-index-compaction")
+        compaction.start()
+        return compaction
+
+    def nearest(self, query_vector: np.ndarray, k: int,
+                snapshot: Optional[IndexSnapshot] = None) -> list[tuple[int, float]]:
+        snapshot = snapshot if snapshot is not None else self.snapshot
+        backend = self.backend if len(snapshot.vectors) >= self.ann_min_rows else self.exact
+        return backend.nearest(snapshot.vectors, snapshot.live, query_vector, k)
+
+    @staticmethod
+    def from_env(index_dir: str) -> "CodeEmbeddingIndex":
+        return CodeEmbeddingIndex(index_dir, search_backend_from_env(), ann_min_rows_from_env())
+
+    def search(self, query: str, k: int = 5) -> list[tuple[CodeChunk, float]]:
+        snapshot = self.snapshot
+        return [(snapshot.chunks[row], score)
+                for row, score in self.nearest(encode([query], QUERY_PROMPT)[0], k, snapshot)]
@@ -0,0 +1,106 @@
+import os
+import threading
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+EMBEDDING_MODEL = "EMBEDDING_MODEL"
+EMBEDDING_BATCH_SIZE = "EMBEDDING_BATCH_SIZE"
+EMBEDDING_THREADS = "EMBEDDING_THREADS"
+EMBEDDING_WORKER_ADDRESS = "EMBEDDING_WORKER_ADDRESS"
+EMBEDDING_WORKER_AUTHKEY = "EMBEDDING_WORKER_AUTHKEY"
+DEFAULT_EMBEDDING_MODEL = "jinaai/jina-embeddings-v4"
+DEFAULT_SPACY_MODEL = "en_core_web_sm"
+
+SENTENCE_TRANSFORMER = "sentence_transformer"
+SPACY = "spacy"
+
+QUERY_PROMPT = "query"
+PASSAGE_PROMPT = "passage"
+
+# Extra encode() arguments some models need, e.g. jina-embeddings-v4 serves several tasks with LoRA adapters
+MODEL_ENCODE_OPTIONS = {"jinaai/jina-embeddings-v4": {"task": "retrieval"}}
+
+
+def embedding_model_name() -> str:
+    return os.environ.get(EMBEDDING_MODEL, DEFAULT_EMBEDDING_MODEL)
+
+
+def load_sentence_transformer(name: str) -> Any:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    threads = os.environ.get(EMBEDDING_THREADS)
+    if threads:
+        # CPU inference threads for this process; set before the first model runs
+        torch.set_num_threads(int(threads))
+    return SentenceTransformer(name, trust_remote_code=True)
+
+
+def load_spacy(name: str) -> Any:
+    import spacy
+    return spacy.load(name)
+
+
+class ModelRegistry:
+    """
+    Process-wide, lazily loaded models: nothing is loaded on import, each model is loaded once on first use (by
+    whichever thread gets there first) and then shared. warm_up() loads models ahead of the first request.
+    """
+
+    def __init__(self, loaders: dict[str, Callable[[str], Any]]):
+        self.loaders = loaders
+        self.models: dict[tuple[str, str], Any] = {}
+        self.lock = threading.Lock()
+
+    def get(self, kind: str, name: str) -> Any:
+        key = (kind, name)
+        model = self.models.get(key)
+        if model is None:
+            with self.lock:
+                model = self.models.get(key)
+                if model is None:
+                    model = self.loaders[kind](name)
+                    self.models[key] = model
+        return model
+
+    def warm_up(self, models: list[tuple[str, str]]) -> None:
+        for kind, name in models:
+            self.get(kind, name)
+
+    def loaded(self) -> list[tuple[str, str]]:
+        return list(self.models.keys())
+
+
+registry = ModelRegistry({SENTENCE_TRANSFORMER: load_sentence_transformer, SPACY: load_spacy})
+
+
+def sentence_transformer(name: Optional[str] = None) -> Any:
+    return registry.get(SENTENCE_TRANSFORMER, name or embedding_model_name())
+
+
+def spacy_model(name: str = DEFAULT_SPACY_MODEL) -> Any:
+    return registry.get(SPACY, name)
+
+
+def batch_size_from_env() -> int:
+    return int(os.environ.get(EMBEDDING_BATCH_SIZE, "32"))
+
+
+def encode_locally(texts: list[str], prompt_name: str = PASSAGE_PROMPT, batch_size: Optional[int] = None,
+                   model_name: Optional[str] = None) -> np.ndarray:
+    # Unit-length float32 rows, so cosine similarity is a dot product
+    model_name = model_name or embedding_model_name()
+    model = sentence_transformer(model_name)
+    # Models without separate query and passage prompts embed both the same way
+    prompt = {"prompt_name": prompt_name} if prompt_name in (model.prompts or {}) else {}
+    vectors = model.encode(texts, batch_size=batch_size or batch_size_from_env(), convert_to_numpy=True,
+                           normalize_embeddings=True, **prompt, **MODEL_ENCODE_OPTIONS.get(model_name, {}))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def encode(texts: list[str], prompt_name: str = PASSAGE_PROMPT, batch_size: Optional[int] = None) -> np.ndarray:
+    # With an embedding worker running, every process shares its one loaded model instead of loading its own
+    if os.environ.get(EMBEDDING_WORKER_ADDRESS):
+        from src.embedding.embedding_worker import worker_client
+        return worker_client().encode(texts, prompt_name, batch_size)
+    return encode_locally(texts, prompt_name, batch_size)
@@ -0,0 +1,130 @@
+import argparse
+import ipaddress
+import os
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client, Connection
+from typing import Optional, Union
+
+import numpy as np
+
+from src.embedding.embedding_models import EMBEDDING_WORKER_ADDRESS, EMBEDDING_WORKER_AUTHKEY, SENTENCE_TRANSFORMER, \
+    PASSAGE_PROMPT, encode_locally, embedding_model_name, registry
+
+# A long-lived local process holding the embedding model, so several agents, MCP servers and indexing runs share
+# one loaded copy. Run it with:
+#   python -m src.embedding.embedding_worker --address /tmp/inductor-embeddings.sock
+# and set EMBEDDING_WORKER_ADDRESS to the same address in the processes which should use it. Addresses are Unix
+# socket paths, or host:port for a loopback TCP socket. Requests are pickled, so the worker only listens locally,
+# its Unix socket is private to its user, and every connection must prove the shared EMBEDDING_WORKER_AUTHKEY.
+LOCALHOST = "localhost"
+
+Address = Union[str, tuple[str, int]]
+
+
+def parsed_address(address: str) -> Address:
+    host, separator, port = address.rpartition(":")
+    if not (separator and port.isdigit()):
+        return address
+    if host != LOCALHOST and not is_loopback(host):
+        raise ValueError(f"Embedding worker address {address} is not a loopback address")
+    return host, int(port)
+
+
+def is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def authkey() -> bytes:
+    key = os.environ.get(EMBEDDING_WORKER_AUTHKEY)
+    if not key:
+        raise ValueError(f"{EMBEDDING_WORKER_AUTHKEY} must be set to a shared secret to use the embedding worker")
+    return key.encode()
+
+
+def private_listener(address: Address, key: bytes) -> Listener:
+    if isinstance(address, tuple):
+        return Listener(address, authkey=key)
+    # Bind the Unix socket readable and writable by this user only
+    previous_umask = os.umask(0o177)
+    try:
+        return Listener(address, authkey=key)
+    finally:
+        os.umask(previous_umask)
+
+
+def serve_connection(connection: Connection, encoding_lock: threading.Lock) -> None:
+    with connection:
+        while True:
+            try:
+                texts, prompt_name, batch_size = connection.recv()
+            except EOFError:
+                return
+            try:
+                # One encode at a time: the model already uses every inference thread it was given
+                with encoding_lock:
+                    connection.send(encode_locally(texts, prompt_name, batch_size))
+            except Exception as e:
+                connection.send(e)
+
+
+def serve(address: str) -> None:
+    listener_address, key = parsed_address(address), authkey()
+    registry.warm_up([(SENTENCE_TRANSFORMER, embedding_model_name())])
+    encoding_lock = threading.Lock()
+    with private_listener(listener_address, key) as listener:
+        print(f"Embedding worker serving {embedding_model_name()} on {address}")
+        while True:
+            try:
+                # accept() also checks the client's authkey; a client with the wrong key is dropped
+                connection = listener.accept()
+            except (AuthenticationError, OSError) as e:
+                print(f"Rejected embedding worker connection: {e}")
+                continue
+            threading.Thread(target=serve_connection, args=(connection, encoding_lock), daemon=True).start()
+
+
+class EmbeddingWorkerClient:
+    # One connection per process, reopened if the worker restarted
+    def __init__(self, address: str):
+        self.address = parsed_address(address)
+        self.connection: Optional[Connection] = None
+        self.lock = threading.Lock()
+
+    def request(self, texts: list[str], prompt_name: str, batch_size: Optional[int]) -> np.ndarray:
+        if self.connection is None:
+            self.connection = Client(self.address, authkey=authkey())
+        self.connection.send((texts, prompt_name, batch_size))
+        response = self.connection.recv()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def encode(self, texts: list[str], prompt_name: str = PASSAGE_PROMPT,
+               batch_size: Optional[int] = None) -> np.ndarray:
+        with self.lock:
+            try:
+                return self.request(texts, prompt_name, batch_size)
+            except (EOFError, OSError):
+                self.connection = None
+                return self.request(texts, prompt_name, batch_size)
+
+
+clients: dict[str, EmbeddingWorkerClient] = {}
+
+
+def worker_client() -> EmbeddingWorkerClient:
+    address = os.environ[EMBEDDING_WORKER_ADDRESS]
+    if address not in clients:
+        clients[address] = EmbeddingWorkerClient(address)
+    return clients[address]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve embeddings from one loaded model over a local socket")
+    parser.add_argument("--address", default=os.environ.get(EMBEDDING_WORKER_ADDRESS, "/tmp/inductor-embeddings.sock"))
+    args = parser.parse_args()
+    serve(args.address)
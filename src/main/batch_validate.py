@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+from typing import Any, TextIO
+
+from src.domain.induction_node import InferenceNode
+from src.taskgraph.graph_builder import make_graph, start_task_graph, mcp_client, neo4j_operations_from_env
+from src.taskgraph.input_source import QueueInput
+from src.taskgraph.mcp_session_pool import mcp_session_pool
+from src.taskgraph.tool_result_cache import tool_result_cache_from_env
+from src.taskgraph.state_keys import BASE_HYPOTHESIS_KEY
+
+# Headless batch mode: every line of the input JSONL is a hypothesis {"subject": ..., "relation": ...,
+# "object": ...}. Each one gets its inference tree built and validated, with up to --workers of them in
+# flight at once, and a result line is appended to the output JSONL as soon as it finishes.
+BUILD_TREE_INPUT = "t"
+VALIDATE_INPUT = "v"
+QUIT_INPUT = "quit"
+
+
+def session_inputs(hypothesis: dict[str, str]) -> list[str]:
+    # What a user would type at the executive and tree-init prompts to build and then validate the tree
+    return [BUILD_TREE_INPUT, hypothesis["subject"], hypothesis["relation"], hypothesis["object"],
+            VALIDATE_INPUT, QUIT_INPUT]
+
+
+def result_of(hypothesis: dict[str, str], final_state: dict[str, Any], seconds: float) -> dict[str, Any]:
+    root: InferenceNode = final_state.get(BASE_HYPOTHESIS_KEY)
+    if root is None:
+        return {**hypothesis, "error": "No inference tree was built", "seconds": seconds}
+    belief = root.node.belief
+    return {**hypothesis, "belief": {"alpha": belief.alpha, "beta": belief.beta, "mean": belief.mean()},
+            "tree": root.as_tree(), "seconds": seconds}
+
+
+async def worker(graph, input_source: QueueInput, hypotheses: asyncio.Queue, output: TextIO) -> None:
+    while True:
+        hypothesis = await hypotheses.get()
+        if hypothesis is None:
+            return
+        started_at = time.perf_counter()
+        try:
+            for line in session_inputs(hypothesis):
+                input_source.put(line)
+            final_state = await start_task_graph(f"Validate: {hypothesis['subject']} {hypothesis['relation']} "
+                                                 f"{hypothesis['object']}", graph)
+            result = result_of(hypothesis, final_state, time.perf_counter() - started_at)
+        except Exception as e:
+            result = {**hypothesis, "error": str(e), "seconds": time.perf_counter() - started_at}
+        finally:
+            # Drop whatever a failed session left unread, so it cannot leak into the next hypothesis
+            while not input_source.queue.empty():
+                input_source.queue.get_nowait()
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
+async def validate_batch(input_path: str, output_path: str, worker_count: int) -> None:
+    hypotheses: asyncio.Queue = asyncio.Queue()
+    with open(input_path) as input_file:
+        for line in input_file:
+            if line.strip():
+                hypotheses.put_nowait(json.loads(line))
+    for _ in range(worker_count):
+        hypotheses.put_nowait(None)
+
+    # One MCP session pool, tool result cache and Neo4j driver shared by all workers; each worker has its own
+    # graph and inputs
+    neo4j_ops = neo4j_operations_from_env()
+    try:
+        async with AsyncExitStack() as stack:
+            session_pool = await stack.enter_async_context(mcp_session_pool(mcp_client))
+            tool_cache = tool_result_cache_from_env()
+            if tool_cache is not None:
+                stack.callback(tool_cache.close)
+            input_sources = [QueueInput() for _ in range(worker_count)]
+            graphs = [await stack.enter_async_context(make_graph(mcp_client, input_source=input_source,
+                                                                 neo4j_ops=neo4j_ops,
+                                                                 session_pool=session_pool,
+                                                                 tool_cache=tool_cache))
+                      for input_source in input_sources]
+            with open(output_path, "a") as output:
+                await asyncio.gather(*(worker(graph, input_source, hypotheses, output)
+                                       for graph, input_source in zip(graphs, input_sources)))
+    finally:
+        neo4j_ops.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and validate inference trees for a file of hypotheses")
+    parser.add_argument("--input", required=True, help="JSONL of {subject, relation, object} hypotheses")
+    parser.add_argument("--output", required=True, help="JSONL to append per-hypothesis results to")
+    parser.add_argument("--workers", type=int, default=4, help="Hypotheses validated concurrently")
+    args = parser.parse_args()
+    asyncio.run(validate_batch(args.input, args.output, args.workers))
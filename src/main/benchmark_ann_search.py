@@ -0,0 +1,78 @@
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+from src.embedding.ann import ExactSearch, IvfFlatSearch, HnswSearch, SearchBackend
+
+# Recall@k and query latency of the approximate code index backends against exact search, on a synthetic corpus
+# of unit vectors drawn around cluster centres (real embeddings are similarly clustered by topic). Queries are
+# fresh draws from the same clusters.
+CLUSTERS = 1000
+CLUSTER_SPREAD = 1.5
+
+
+def unit(rows: np.ndarray) -> np.ndarray:
+    return (rows / np.linalg.norm(rows, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_corpus(centres: np.ndarray, rows: int, random: np.random.Generator) -> np.ndarray:
+    dimension = centres.shape[1]
+    corpus = np.empty((rows, dimension), dtype=np.float32)
+    for start in range(0, rows, 65536):
+        count = min(65536, rows - start)
+        # Noise vectors of norm about CLUSTER_SPREAD around a random centre
+        noise = random.standard_normal((count, dimension)).astype(np.float32) * CLUSTER_SPREAD / np.sqrt(dimension)
+        corpus[start:start + count] = unit(centres[random.integers(CLUSTERS, size=count)] + noise)
+    return corpus
+
+
+def timed_queries(backend: SearchBackend, corpus: np.ndarray, live: np.ndarray, queries: np.ndarray,
+                  k: int) -> tuple[list[set[int]], float]:
+    results = []
+    started_at = time.perf_counter()
+    for query in queries:
+        results.append({row for row, _ in backend.nearest(corpus, live, query, k)})
+    return results, (time.perf_counter() - started_at) / len(queries)
+
+
+def run(rows: int, dimension: int, query_count: int, k: int) -> None:
+    random = np.random.default_rng(0)
+    print(f"Corpus of {rows} x {dimension}, {query_count} queries, recall@{k}")
+    centres = unit(random.standard_normal((CLUSTERS, dimension)))
+    corpus = synthetic_corpus(centres, rows, random)
+    live = np.ones(rows, dtype=bool)
+    queries = synthetic_corpus(centres, query_count, random)
+
+    truth, exact_latency = timed_queries(ExactSearch(), corpus, live, queries, k)
+    print(f"{'backend':<36}{'build s':>10}{'query ms':>10}{'recall':>8}{'speed-up':>10}")
+    print(f"{'exact':<36}{0:>10.2f}{exact_latency * 1000:>10.2f}{1:>8.3f}{1:>10.1f}")
+
+    configurations: list[tuple[str, Callable[[], SearchBackend]]] = [
+        (f"ivf_flat lists={lists} probes={probes}", lambda lists=lists, probes=probes: IvfFlatSearch(lists, probes))
+        for lists in [int(4 * np.sqrt(rows))] for probes in [1, 4, 16, 64, 128]]
+    configurations += [(f"hnsw M=16 ef={ef}", lambda ef=ef: HnswSearch(16, 200, ef)) for ef in [16, 64, 256]]
+    for label, make_backend in configurations:
+        try:
+            backend = make_backend()
+        except ImportError as e:
+            print(f"{label:<36}skipped: {e}")
+            continue
+        started_at = time.perf_counter()
+        # The first query builds the index
+        backend.nearest(corpus, live, queries[0], k)
+        build_seconds = time.perf_counter() - started_at
+        results, latency = timed_queries(backend, corpus, live, queries, k)
+        recall = np.mean([len(found & expected) / k for found, expected in zip(results, truth)])
+        print(f"{label:<36}{build_seconds:>10.2f}{latency * 1000:>10.2f}{recall:>8.3f}{exact_latency / latency:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark approximate code index search against exact search")
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    run(args.rows, args.dimension, args.queries, args.k)
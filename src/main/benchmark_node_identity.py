@@ -0,0 +1,53 @@
+import time
+
+from src.domain.beta_bernoulli_belief import equally_likely
+from src.domain.evidence import Evidence
+from src.domain.hypothesis import Hypothesis
+from src.domain.induction_node import InferenceNode
+
+# Times the equality-driven operations performed on inference trees: locating children among their siblings,
+# membership checks on a stack of visited nodes, and rendering a node by accident in a log line
+HYPOTHESIS_COUNT = 500
+EVIDENCES_PER_HYPOTHESIS = 8
+
+
+def synthetic_tree() -> InferenceNode:
+    return InferenceNode(Hypothesis.create_from_strings("program", "is", "benchmarked", equally_likely(), 1.0),
+                         [InferenceNode(Hypothesis.create_from_strings("section", "is", "benchmarked",
+                                                                       equally_likely(), 1 / HYPOTHESIS_COUNT),
+                                        [InferenceNode(Evidence("evidence", 1 / EVIDENCES_PER_HYPOTHESIS,
+                                                                equally_likely()))
+                                         for _ in range(EVIDENCES_PER_HYPOTHESIS)])
+                          for _ in range(HYPOTHESIS_COUNT)])
+
+
+def timed(label: str, operation) -> None:
+    started_at = time.perf_counter()
+    operation()
+    print(f"{label}: {time.perf_counter() - started_at:.4f}s")
+
+
+def run() -> None:
+    root = synthetic_tree()
+    hypotheses = root.children
+    visited = []
+
+    def index_every_child():
+        for hypothesis in hypotheses:
+            root.children.index(hypothesis)
+            for evidence in hypothesis.children:
+                hypothesis.children.index(evidence)
+
+    def stack_membership():
+        for hypothesis in hypotheses:
+            visited.append(hypothesis)
+            _ = hypothesis in visited
+
+    timed(f"index() of every child in a {1 + HYPOTHESIS_COUNT * (1 + EVIDENCES_PER_HYPOTHESIS)}-node tree",
+          index_every_child)
+    timed(f"membership checks on a growing stack of {HYPOTHESIS_COUNT} hypotheses", stack_membership)
+    timed("repr() of the root", lambda: repr(root))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+import time
+
+from src.domain.beta_bernoulli_belief import equally_likely
+from src.domain.evidence import Evidence
+from src.domain.hypothesis import Hypothesis
+from src.domain.induction_node import InferenceNode
+from src.taskgraph.nodes.state_operations import stack
+from src.taskgraph.nodes.validate_hypothesis_post_exec import validate_hypothesis_post_exec
+from src.taskgraph.state_keys import BASE_HYPOTHESIS_KEY, RECURSION_STACK_KEY
+
+# Drives the validation traversal (the post-exec step, with stub evidence visits in place of the LLM agent)
+# over a synthetic tree: a root with HYPOTHESIS_COUNT sub-hypotheses, each with EVIDENCES_PER_HYPOTHESIS evidences
+HYPOTHESIS_COUNT = 1000
+EVIDENCES_PER_HYPOTHESIS = 4
+
+
+def synthetic_tree() -> InferenceNode:
+    return InferenceNode(Hypothesis.create_from_strings("program", "is", "benchmarked", equally_likely(), 1.0),
+                         [InferenceNode(Hypothesis.create_from_strings(f"section {h}", "is", "benchmarked",
+                                                                       equally_likely(), 1 / HYPOTHESIS_COUNT),
+                                        [InferenceNode(Evidence(f"evidence {h}.{e}", 1 / EVIDENCES_PER_HYPOTHESIS,
+                                                                equally_likely()))
+                                         for e in range(EVIDENCES_PER_HYPOTHESIS)])
+                          for h in range(HYPOTHESIS_COUNT)])
+
+
+def stub_visit_evidence(state) -> None:
+    evidence: Evidence = stack(state)[-1][0].node
+    evidence.belief = evidence.belief.update((1, 0))
+
+
+def run() -> None:
+    root = synthetic_tree()
+    node_count = 1 + HYPOTHESIS_COUNT * (1 + EVIDENCES_PER_HYPOTHESIS)
+    state = {"input": "", "current_request": "", "messages": [], BASE_HYPOTHESIS_KEY: root,
+             RECURSION_STACK_KEY: [(root, 0)]}
+    steps = 0
+    visited_evidences = 0
+    started_at = time.perf_counter()
+    while state[RECURSION_STACK_KEY]:
+        if isinstance(stack(state)[-1][0].node, Evidence):
+            stub_visit_evidence(state)
+            visited_evidences += 1
+        state.update(validate_hypothesis_post_exec(state))
+        steps += 1
+    elapsed = time.perf_counter() - started_at
+    assert visited_evidences == HYPOTHESIS_COUNT * EVIDENCES_PER_HYPOTHESIS
+    print(f"Validated {node_count} nodes in {steps} steps: {elapsed:.3f}s ({elapsed / steps * 1e6:.1f}us per step)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from src.embedding.code_index import CodeEmbeddingIndex, codebase_chunks, MAX_CHUNK_LINES
+
+# Chunks a codebase by section and brings the index served by the searchCode tool up to date with it. Only chunks
+# whose content hash is not in the index yet are embedded; chunks no longer in the codebase are tombstoned.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the code section embedding index")
+    parser.add_argument("--codebase", required=True, help="HLASM source file or directory")
+    parser.add_argument("--index-dir", default="./code_index", help="Where to write the vectors and side table")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16",
+                        help="Vector precision of a new index")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-chunk-lines", type=int, default=MAX_CHUNK_LINES)
+    parser.add_argument("--compact", action="store_true", help="Drop all tombstoned rows after refreshing")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    chunks = codebase_chunks(args.codebase, args.max_chunk_lines)
+    index = CodeEmbeddingIndex(args.index_dir)
+    if index.vectors_file is None:
+        index.dtype = args.dtype
+    stats = index.refresh(chunks, args.batch_size)
+    print(f"{len(chunks)} chunks: {stats.added} embedded, {stats.kept} unchanged, {stats.deleted} tombstoned "
+          f"in {time.perf_counter() - started_at:.1f}s")
+    if args.compact and not stats.compacting:
+        index.compact()
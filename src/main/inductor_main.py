@@ -1,11 +1,35 @@
+import argparse
 import asyncio
-from src.taskgraph.graph_builder import make_graph, start_task_graph, mcp_client
+import os
+import uuid
+from contextlib import AsyncExitStack
 
+from src.taskgraph.checkpointing import sqlite_checkpointer
+from src.taskgraph.graph_builder import make_graph, start_task_graph, resume_task_graph, mcp_client
 
-async def run_inductor():
-    async with make_graph(mcp_client) as graph:
-        await start_task_graph("Tell me about this codebase", graph)
+CHECKPOINT_DB = "CHECKPOINT_DB"
+
+
+async def run_inductor(thread_id: str | None, resume: bool):
+    async with AsyncExitStack() as stack:
+        checkpoint_db = os.environ.get(CHECKPOINT_DB)
+        checkpointer = await stack.enter_async_context(sqlite_checkpointer(checkpoint_db)) if checkpoint_db else None
+        graph = await stack.enter_async_context(make_graph(mcp_client, checkpointer))
+        if resume:
+            await resume_task_graph(graph, thread_id)
+        else:
+            await start_task_graph("Tell me about this codebase", graph, thread_id)
 
 
 if __name__ == "__main__":
-    asyncio.run(run_inductor())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--thread-id", help="Session id under which steps are checkpointed (needs CHECKPOINT_DB)")
+    parser.add_argument("--resume", action="store_true", help="Continue the session from its last checkpoint")
+    args = parser.parse_args()
+    if args.resume and not (args.thread_id and os.environ.get(CHECKPOINT_DB)):
+        parser.error("--resume needs --thread-id and CHECKPOINT_DB")
+    if os.environ.get(CHECKPOINT_DB) and not args.thread_id:
+        # A checkpointed graph needs a thread id on every invocation; print it so the session can be resumed
+        args.thread_id = str(uuid.uuid4())
+        print(f"Checkpointing session under thread id {args.thread_id}")
+    asyncio.run(run_inductor(args.thread_id, args.resume))
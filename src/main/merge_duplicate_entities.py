@@ -0,0 +1,28 @@
+import os
+
+from dotenv import load_dotenv
+
+from src.domain.hypothesis_operations import HypothesisOperations
+from src.domain.id_provider import UuidProvider
+from src.domain.neo4j_operations import Neo4jOperations
+
+load_dotenv("./env/.env")
+
+
+def merge_duplicate_entities() -> None:
+    neo4j_ops = Neo4jOperations(os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                                os.getenv("NEO4J_USER", "neo4j"),
+                                os.getenv("NEO4J_PASSWORD", "password"),
+                                id_provider=UuidProvider())
+    hypothesis_ops = HypothesisOperations(neo4j_ops, resolve_entities=True)
+    try:
+        merged_counts = hypothesis_ops.merge_duplicate_entities()
+        print(f"Merged duplicates: {merged_counts}")
+        hypothesis_ops.create_entity_constraints()
+        print("Created normalised name constraints")
+    finally:
+        neo4j_ops.close()
+
+
+if __name__ == "__main__":
+    merge_duplicate_entities()
@@ -0,0 +1,39 @@
+import asyncio
+
+from src.taskgraph.graph_builder import mcp_client
+from src.taskgraph.mcp_session_pool import mcp_session_pool
+from src.taskgraph.node_names import DECOMPOSE_HYPOTHESIS, EXPAND_INFERENCE_FRONTIER, SYSTEM_QUERY, VISIT_EVIDENCE
+from src.taskgraph.tool_selection import NODE_TOOLS, tools_for, schema_tokens, approximate_tokens, \
+    compact_tool_descriptions
+
+# Approximate input tokens per call spent on tools, for each LLM-calling node: the schemas of the bound tools
+# plus any tool list interpolated into the prompt. "Before" is every tool bound and tools rendered with their
+# full repr; "after" is the node's NODE_TOOLS subset and the compact renderer.
+PROMPT_TOOLS_NODES = [DECOMPOSE_HYPOTHESIS, EXPAND_INFERENCE_FRONTIER, SYSTEM_QUERY]
+ALREADY_SUBSET_NODES = [DECOMPOSE_HYPOTHESIS, EXPAND_INFERENCE_FRONTIER, VISIT_EVIDENCE]
+
+
+async def report() -> None:
+    async with mcp_session_pool(mcp_client) as session_pool:
+        mcp_tools = await session_pool.get_tools()
+
+    print(f"{'node':<40}{'tools before':>14}{'tools after':>13}{'tokens before':>15}{'tokens after':>14}{'saved':>8}")
+    total_before, total_after = 0, 0
+    for node_name in NODE_TOOLS:
+        node_tools = tools_for(node_name, mcp_tools)
+        bound_before = node_tools if node_name in ALREADY_SUBSET_NODES else mcp_tools
+        prompt_tools = mcp_tools if node_name == SYSTEM_QUERY else node_tools
+        before = schema_tokens(bound_before)
+        after = schema_tokens(node_tools) if node_tools else 0
+        if node_name in PROMPT_TOOLS_NODES:
+            before += approximate_tokens(str(prompt_tools))
+            after += approximate_tokens(compact_tool_descriptions(prompt_tools))
+        total_before += before
+        total_after += after
+        print(f"{node_name:<40}{len(bound_before):>14}{len(node_tools):>13}{before:>15}{after:>14}"
+              f"{before - after:>8}")
+    print(f"{'total':<40}{'':>14}{'':>13}{total_before:>15}{total_after:>14}{total_before - total_after:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(report())
@@ -1,7 +1,6 @@
 import numpy as np
-from transformers import AutoModel, AutoTokenizer
-import torch
-import torch.nn.functional as F
+
+from src.embedding.embedding_models import sentence_transformer
 
 checkpoint = "codesage/codesage-large-v2"
 device = "cpu"  # for GPU usage or "cpu" for CPU usage
@@ -27,8 +26,6 @@ device = "cpu"  # for GPU usage or "cpu" for CPU usage
 # print("Code embedding shape:", code_emb[0].shape)
 # print("Query embedding shape:", query_emb[0].shape)
 
-from sentence_transformers import SentenceTransformer
-
 # queries = ['Calculate the factorial of a number']
 queries = ['This line processes an order and handles errors and also displays status']
 # code_snippets = ['def fact(n):\n if n < 0:\n  raise ValueError\n return 1 if n == 0 else n * fact(n - 1)']
@@ -44,29 +41,36 @@ code_snippets = ['''PROCESS-ORDER.
                  DISPLAY "STATUS: " ORDER-STATUS.
                  STOP RUN.''']
 
-# model = SentenceTransformer("nomic-ai/nomic-embed-code")
-# model = SentenceTransformer("codesage/codesage-large-v2", trust_remote_code=True)
-# model = SentenceTransformer("nomic-ai/nomic-embed-text-v1.5", trust_remote_code=True)
-model = SentenceTransformer("jinaai/jina-embeddings-v4", trust_remote_code=True)
-query_emb = model.encode(queries, task="retrieval", prompt_name="query")
-code_emb = model.encode(code_snippets, task="retrieval", prompt_name="query")
 
-query_embedding = query_emb[0]
-code_embedding = code_emb[0]
-similarity = model.similarity(query_embedding, code_embedding)
-print("Code embedding shape:", code_embedding.shape)
-print("Query embedding shape:", query_embedding.shape)
+def main():
+    # model = SentenceTransformer("nomic-ai/nomic-embed-code")
+    # model = SentenceTransformer("codesage/codesage-large-v2", trust_remote_code=True)
+    # model = SentenceTransformer("nomic-ai/nomic-embed-text-v1.5", trust_remote_code=True)
+    # The model is loaded on first use through the shared registry, not when this module is imported
+    model = sentence_transformer("jinaai/jina-embeddings-v4")
+    query_emb = model.encode(queries, task="retrieval", prompt_name="query")
+    code_emb = model.encode(code_snippets, task="retrieval", prompt_name="query")
+
+    query_embedding = query_emb[0]
+    code_embedding = code_emb[0]
+    similarity = model.similarity(query_embedding, code_embedding)
+    print("Code embedding shape:", code_embedding.shape)
+    print("Query embedding shape:", query_embedding.shape)
+
+    normalised_query_embedding = query_embedding / np.linalg.norm(query_embedding)
+    normalised_code_embedding = code_embedding / np.linalg.norm(code_embedding)
+
+    similarity_np = np.dot(normalised_query_embedding, normalised_code_embedding)
+    per_dim_contrib = normalised_query_embedding * normalised_code_embedding
 
-normalised_query_embedding = query_embedding / np.linalg.norm(query_embedding)
-normalised_code_embedding = code_embedding / np.linalg.norm(code_embedding)
+    topk = np.argsort(per_dim_contrib)[-10:]   # top 10 contributing dimensions
+    # for k in topk:
+    #     print(f"{k}-{per_dim_contrib[k]}")
+    print("Top contributing dims:", topk)
+    print("Top contrib values:", per_dim_contrib[topk])
 
-similarity_np = np.dot(normalised_query_embedding, normalised_code_embedding)
-per_dim_contrib = normalised_query_embedding * normalised_code_embedding
+    print(similarity)
 
-topk = np.argsort(per_dim_contrib)[-10:]   # top 10 contributing dimensions
-# for k in topk:
-#     print(f"{k}-{per_dim_contrib[k]}")
-print("Top contributing dims:", topk)
-print("Top contrib values:", per_dim_contrib[topk])
 
-print(similarity)
+if __name__ == "__main__":
+    main()
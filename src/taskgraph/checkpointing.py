@@ -0,0 +1,234 @@
+import hashlib
+import json
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import aiosqlite
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.evidence import Evidence
+from src.domain.hypothesis import Hypothesis
+from src.domain.hypothesis_object import HypothesisObject
+from src.domain.hypothesis_subject import HypothesisSubject
+from src.domain.induction_node import InferenceNode
+
+INFERENCE_TREES_TYPE = "inference_trees"
+
+# Placeholders for tree references inside the value handed to JsonPlus
+NODE_REFERENCE = "__inference_node__"
+FRAMES_REFERENCE = "__inference_frames__"
+
+
+class TreeTable:
+    """The distinct inference trees referenced by one serialized value, each encoded once."""
+
+    def __init__(self):
+        self.trees: list[bytes] = []
+        self.indexes: dict[str, int] = {}
+        self.paths: list[dict[str, list[int]]] = []
+
+    def reference(self, inference_node: InferenceNode) -> list:
+        root = tree_root(inference_node)
+        if root.id not in self.indexes:
+            self.indexes[root.id] = len(self.trees)
+            self.trees.append(zlib.compress(encoded_tree(root)))
+            self.paths.append(paths_by_id(root))
+        tree_index = self.indexes[root.id]
+        return [tree_index, self.paths[tree_index][inference_node.id]]
+
+    def substituted(self, obj: Any) -> Any:
+        # The value with its nodes and stacks replaced by references; containers without any are kept as they are
+        if isinstance(obj, InferenceNode):
+            return {NODE_REFERENCE: self.reference(obj)}
+        if is_frames(obj):
+            return {FRAMES_REFERENCE: [self.reference(inference_node) + [counter]
+                                       for inference_node, counter in obj]}
+        if isinstance(obj, dict):
+            items = {key: self.substituted(value) for key, value in obj.items()}
+            return items if any(items[key] is not value for key, value in obj.items()) else obj
+        if isinstance(obj, (list, tuple)):
+            items = [self.substituted(value) for value in obj]
+            if all(item is value for item, value in zip(items, obj)):
+                return obj
+            return items if isinstance(obj, list) else tuple(items)
+        return obj
+
+
+class InferenceStateSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer which stores InferenceNode trees as compressed flat pre-order records (beliefs,
+    contributions and cached child aggregates included, parent links rebuilt on load), and the recursion and
+    inference stacks as child-index paths into those trees. Savers serialize a whole checkpoint in one call, so
+    the trees are found wherever they occur inside the value's dicts, lists and tuples: each distinct tree is
+    encoded once into a table, and nodes and stacks become references into it. Everything else goes through
+    the plain JsonPlus serialization. Every load decodes fresh trees, and everything referring to one tree is
+    restored onto one shared tree, so the stacks point into base_hypothesis just as they did before the
+    checkpoint. Inside restoring_together() that sharing also spans calls, for a checkpoint and its pending writes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.shared_roots: ContextVar[Optional[dict[str, InferenceNode]]] = ContextVar("shared_roots", default=None)
+
+    @contextmanager
+    def restoring_together(self) -> Iterator[None]:
+        token = self.shared_roots.set({})
+        try:
+            yield
+        finally:
+            self.shared_roots.reset(token)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        table = TreeTable()
+        substituted = table.substituted(obj)
+        if not table.trees:
+            return super().dumps_typed(obj)
+        type_, body = super().dumps_typed(substituted)
+        return INFERENCE_TREES_TYPE, ormsgpack.packb([table.trees, type_, body])
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ != INFERENCE_TREES_TYPE:
+            return super().loads_typed(data)
+        trees, body_type, body = ormsgpack.unpackb(payload)
+        roots = [self.restored_tree(zlib.decompress(tree)) for tree in trees]
+        return restored(super().loads_typed((body_type, body)), roots)
+
+    def restored_tree(self, tree: bytes) -> InferenceNode:
+        shared_roots = self.shared_roots.get()
+        if shared_roots is None:
+            return decoded_tree(tree)
+        key = hashlib.sha256(tree).hexdigest()
+        if key not in shared_roots:
+            shared_roots[key] = decoded_tree(tree)
+        return shared_roots[key]
+
+
+def restored(obj: Any, roots: list[InferenceNode]) -> Any:
+    if isinstance(obj, dict):
+        if len(obj) == 1 and NODE_REFERENCE in obj:
+            tree_index, path = obj[NODE_REFERENCE]
+            return node_at(roots[tree_index], path)
+        if len(obj) == 1 and FRAMES_REFERENCE in obj:
+            return [(node_at(roots[tree_index], path), counter)
+                    for tree_index, path, counter in obj[FRAMES_REFERENCE]]
+        return {key: restored(value, roots) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [restored(value, roots) for value in obj]
+    return obj
+
+
+def is_frames(obj: Any) -> bool:
+    return (isinstance(obj, list) and len(obj) > 0 and isinstance(obj[0], tuple)
+            and isinstance(obj[0][0], InferenceNode))
+
+
+def tree_root(inference_node: InferenceNode) -> InferenceNode:
+    root = inference_node
+    for ancestor in inference_node.ancestors():
+        root = ancestor
+    return root
+
+
+def paths_by_id(root: InferenceNode) -> dict[str, list[int]]:
+    paths = {root.id: []}
+    pending = [root]
+    while pending:
+        inference_node = pending.pop()
+        for index, child in enumerate(inference_node.children):
+            paths[child.id] = paths[inference_node.id] + [index]
+            pending.append(child)
+    return paths
+
+
+def node_at(root: InferenceNode, path: list[int]) -> InferenceNode:
+    inference_node = root
+    for index in path:
+        inference_node = inference_node.children[index]
+    return inference_node
+
+
+def encoded_tree(root: InferenceNode) -> bytes:
+    # One record per node in pre-order, with its child count, so the tree can be rebuilt without recursion
+    records = []
+    pending = [root]
+    while pending:
+        inference_node = pending.pop()
+        node = inference_node.node
+        record = [inference_node.id, len(inference_node.children), node.id, node.belief.alpha, node.belief.beta,
+                  inference_node.children_terms]
+        if isinstance(node, Hypothesis):
+            record += [node.contribution_to_root, node.subject.name, node.subject.id, node.relation,
+                       node.object.name, node.object.id]
+        else:
+            record += [node.contribution_to_hypothesis, node.evidence_description]
+        records.append(record)
+        pending.extend(reversed(inference_node.children))
+    return json.dumps(records, separators=(",", ":")).encode()
+
+
+def decoded_tree(tree: bytes) -> InferenceNode:
+    root: Optional[InferenceNode] = None
+    open_parents: list[list] = []  # [node, children still to attach]
+    cached_terms = []
+    for record in json.loads(tree):
+        inference_node_id, child_count, node_id, alpha, beta, children_terms, contribution, *statement = record
+        belief = BetaBernoulliBelief(alpha, beta)
+        if len(statement) == 5:
+            subject_name, subject_id, relation, object_name, object_id = statement
+            node = Hypothesis(HypothesisSubject(subject_name, subject_id), relation,
+                              HypothesisObject(object_name, object_id), belief=belief,
+                              contribution_to_root=contribution, id=node_id)
+        else:
+            node = Evidence(statement[0], contribution_to_hypothesis=contribution, belief=belief, id=node_id)
+        inference_node = InferenceNode(node, [], id=inference_node_id)
+
+        if open_parents:
+            parent_entry = open_parents[-1]
+            parent_entry[0].add_all([inference_node])
+            parent_entry[1] -= 1
+            if parent_entry[1] == 0:
+                open_parents.pop()
+        else:
+            root = inference_node
+        if child_count > 0:
+            open_parents.append([inference_node, child_count])
+        if children_terms is not None:
+            cached_terms.append((inference_node, tuple(children_terms)))
+
+    # Attaching children clears the cached aggregates, so restore them once the tree is complete
+    for inference_node, children_terms in cached_terms:
+        inference_node.children_terms = children_terms
+    return root
+
+
+class InferenceStateSqliteSaver(AsyncSqliteSaver):
+    # Restores each checkpoint together with its pending writes, so a write's stack points into the same tree
+    serde: InferenceStateSerializer
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.serde.restoring_together():
+            return await super().aget_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs: Any) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = super().alist(config, **kwargs)
+        while True:
+            with self.serde.restoring_together():
+                try:
+                    checkpoint_tuple = await anext(checkpoint_tuples)
+                except StopAsyncIteration:
+                    return
+            yield checkpoint_tuple
+
+
+@asynccontextmanager
+async def sqlite_checkpointer(path: str) -> AsyncIterator[AsyncSqliteSaver]:
+    async with aiosqlite.connect(path) as connection:
+        yield InferenceStateSqliteSaver(connection, serde=InferenceStateSerializer())
@@ -0,0 +1,46 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+
+from src.taskgraph.tool_names import LIST_SECTIONS, CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE
+
+CODEBASE_PROFILE_PREFETCH = "CODEBASE_PROFILE_PREFETCH"
+
+SECTIONS_PROFILE_KEY = "sections"
+COMPLEXITY_PROFILE_KEY = "complexity"
+
+# The overview tools every hypothesize flow would otherwise ask the LLM to call first
+PROFILE_TOOLS = {SECTIONS_PROFILE_KEY: LIST_SECTIONS, COMPLEXITY_PROFILE_KEY: CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE}
+
+
+def parsed(tool_output: Any) -> Any:
+    # MCP tools answer in text, which is JSON for the analyser's structured results
+    if not isinstance(tool_output, str):
+        return tool_output
+    try:
+        return json.loads(tool_output)
+    except json.JSONDecodeError:
+        return tool_output.strip()
+
+
+async def prefetch_codebase_profile(tools: list[BaseTool]) -> Optional[dict[str, Any]]:
+    """
+    Calls the overview tools concurrently and returns their results as a plain (checkpointable) dict, or None
+    if the tools are not available. Through the tool result cache, this is computed once per codebase version.
+    """
+    tools_by_name = {tool.name: tool for tool in tools}
+    if not all(tool_name in tools_by_name for tool_name in PROFILE_TOOLS.values()):
+        return None
+    try:
+        outputs = await asyncio.gather(*(tools_by_name[tool_name].ainvoke({}) for tool_name in PROFILE_TOOLS.values()))
+    except Exception as e:
+        print(f"Could not prefetch the codebase profile: {e}")
+        return None
+    return {key: parsed(output) for key, output in zip(PROFILE_TOOLS.keys(), outputs)}
+
+
+def profile_summary(profile: dict[str, Any]) -> str:
+    return "\n".join(f"{key}: {json.dumps(value, separators=(',', ':'), default=str)}"
+                     for key, value in profile.items())
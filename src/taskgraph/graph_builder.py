@@ -1,20 +1,32 @@
 import asyncio
 import json
-from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator
+import os
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Any, AsyncGenerator, Optional
 
 from anthropic import InternalServerError
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import BaseTool
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.constants import START, END
 from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.types import RetryPolicy
+from langgraph.types import RetryPolicy, Command
 from pydantic import BaseModel
 
+from src.domain.aggregation_strategy import aggregation_strategy, SUMMED_EVIDENCE
+from src.domain.id_provider import UuidProvider
+from src.domain.inference_tree_operations import InferenceTreeOperations
+from src.domain.neo4j_operations import Neo4jOperations
+from src.taskgraph.codebase_profile import CODEBASE_PROFILE_PREFETCH, prefetch_codebase_profile
+from src.taskgraph.input_source import InputSource, ConsoleInput, input_source_from_env
+from src.taskgraph.mcp_session_pool import McpSessionPool, mcp_session_pool
+from src.taskgraph.tool_retrieval import tool_retrieval_from_env
+from src.taskgraph.tool_selection import tools_for, llm_for
+from src.taskgraph.tool_result_cache import ToolResultCache, cached_tools, tool_result_cache_from_env
 from src.taskgraph.models import anthropic_model, ollama_model
 from src.taskgraph.node_names import (
     COLLECT_DATA_FOR_HYPOTHESIS, HYPOTHESIZE, EXPLORE_FREELY, SYSTEM_QUERY,
@@ -22,26 +34,31 @@ from src.taskgraph.node_names import (
     COLLECT_DATA_FOR_HYPOTHESIS_TOOL_OUTPUT, HYPOTHESIS_GATHER_START, DECOMPOSE_HYPOTHESIS, DONT_KNOW,
     EXECUTIVE_AGENT, BREAKDOWN_HYPOTHESIS_TOOL, BUILD_INFERENCE_TREE_INIT,
     BUILD_INFERENCE_NODE_BUILD, INFERENCE_TREE_BUILD_STEP_CALCULATOR, VISIT_HYPOTHESIS, VISIT_EVIDENCE,
-    VALIDATE_HYPOTHESIS_INIT, VALIDATE_HYPOTHESIS_PRE_EXEC, VALIDATE_HYPOTHESIS_POST_EXEC, UPDATE_POSTERIORS
+    VALIDATE_HYPOTHESIS_INIT, VALIDATE_HYPOTHESIS_PRE_EXEC, VALIDATE_HYPOTHESIS_POST_EXEC, UPDATE_POSTERIORS,
+    EXPAND_INFERENCE_FRONTIER, REUSE_SAVED_INFERENCE_TREE
 )
 from src.taskgraph.nodes.build_inference_node_build import build_inference_node_build
-from src.taskgraph.nodes.build_inference_tree_init import build_inference_tree_init_node
+from src.taskgraph.nodes.build_inference_tree_init import build_inference_tree_init_build
 from src.taskgraph.nodes.collect_data_node import collect_data_for_hypothesis
 from src.taskgraph.nodes.decompose_hypothesis import decompose_hypothesis
+from src.taskgraph.nodes.evidence_scheduler import EvidenceScheduler, ToolLatencies, schedule_next_evidence_build
+from src.taskgraph.nodes.expand_inference_frontier import expand_inference_frontier_build
 from src.taskgraph.nodes.executive_node import reverse_engineering_lead
 from src.taskgraph.nodes.exit_inference_recursion import exit_inference_recursion
 from src.taskgraph.nodes.explore_node import free_explore
-from src.taskgraph.nodes.hypothesize_node import hypothesize, hypothesis_exec
+from src.taskgraph.nodes.hypothesize_node import hypothesize, hypothesis_exec_build, \
+    hypothesize_from_profile_or_collect_data
 from src.taskgraph.nodes.inference_tree_build_decider_node import inference_tree_build_step_decider
 from src.taskgraph.nodes.inference_tree_build_next_step_calculator import inference_tree_build_step_calculator
 from src.taskgraph.nodes.inference_tree_decisions import TREE_INCOMPLETE, TREE_COMPLETE
+from src.taskgraph.nodes.persist_inference_tree import persisting, reuse_saved_inference_tree_build
 from src.taskgraph.nodes.re_decider_node import reverse_engineering_step_decider
 from src.taskgraph.nodes.system_query_node import system_query
 from src.taskgraph.nodes.tool_output_node import generic_tool_output
 from src.taskgraph.nodes.travel_inference_tree_decider import goto_hypothesis_or_evidence
-from src.taskgraph.nodes.update_posteriors import update_posteriors
+from src.taskgraph.nodes.update_posteriors import update_posteriors_build
 from src.taskgraph.nodes.utility_nodes import fallback
-from src.taskgraph.nodes.validate_hypothesis import validate_hypothesis_init
+from src.taskgraph.nodes.validate_hypothesis import validate_hypothesis_init_build
 from src.taskgraph.nodes.validate_hypothesis_post_exec import validate_hypothesis_post_exec
 from src.taskgraph.nodes.validate_hypothesis_pre_exec import validate_hypothesis_pre_exec
 from src.taskgraph.nodes.visit_evidence import visit_evidence_build
@@ -50,17 +67,25 @@ from src.taskgraph.router_constants import (
     DONT_KNOW_DECISION, SYSTEM_QUERY_DECISION, FREEFORM_EXPLORATION_DECISION,
     BUILD_INFERENCE_TREE_DECISION, HYPOTHESIZE_DECISION, EXIT_DECISION, VALIDATE_HYPOTHESIS_DECISION,
     VISIT_HYPOTHESIS_DECISION, VISIT_EVIDENCE_DECISION, CONTINUE_RECURSE_INFERENCE_TREE_DECISION,
-    EXIT_RECURSE_INFERENCE_TREE_DECISION
+    EXIT_RECURSE_INFERENCE_TREE_DECISION, HYPOTHESIZE_FROM_PROFILE_DECISION, COLLECT_DATA_DECISION
 )
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import MESSAGES_KEY
-from src.taskgraph.tool_names import CREATE_EVIDENCE_STRATEGY_MCP_TOOL_NAME, BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME, \
-    LIST_SECTIONS, MATCH_REGEX_PATTERN
 from src.taskgraph.models import bedrock_model
-from src.taskgraph.tool_names import CYCLOMATIC_COMPLEXITY_OF_SECTION, CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE
 
 load_dotenv("./env/.env")
 
+POSTERIOR_AGGREGATION = "POSTERIOR_AGGREGATION"
+MIN_PATH_CONTRIBUTION = "MIN_PATH_CONTRIBUTION"
+EVIDENCE_SCHEDULING = "EVIDENCE_SCHEDULING"
+ROOT_INTERVAL_WIDTH_THRESHOLD = "ROOT_INTERVAL_WIDTH_THRESHOLD"
+TREE_ORDER_SCHEDULING = "tree_order"
+VALUE_OF_INFORMATION_SCHEDULING = "value_of_information"
+INFERENCE_TREE_EXPANSION = "INFERENCE_TREE_EXPANSION"
+DEPTH_FIRST_EXPANSION = "depth_first"
+BREADTH_PARALLEL_EXPANSION = "breadth_parallel"
+INFERENCE_TREE_PERSISTENCE = "INFERENCE_TREE_PERSISTENCE"
+
 mcp_client = MultiServerMCPClient(
     {
         "say_hello": {
@@ -78,6 +103,11 @@ mcp_client = MultiServerMCPClient(
             "command": "python",
             "args": ["/Users/asgupta/code/inductor/src/agent/hypothesis_mcp_server.py"],
             "transport": "stdio",
+        },
+        "codeSearch": {
+            "command": "python",
+            "args": ["/Users/asgupta/code/inductor/src/agent/code_search_mcp_server.py"],
+            "transport": "stdio",
         }
     })
 
@@ -94,52 +124,108 @@ class SectionsList(BaseModel):
 
 
 @asynccontextmanager
-async def make_graph(client: MultiServerMCPClient) -> AsyncGenerator[CompiledStateGraph, Any]:
-    # async with client:
-    mcp_tools: list[BaseTool] = await client.get_tools()
-    inference_tree_building_tools = [tool for tool in mcp_tools if
-                                     tool.name in [CREATE_EVIDENCE_STRATEGY_MCP_TOOL_NAME,
-                                                   BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME]]
-    evidence_gathering_tools = [tool for tool in mcp_tools if
-                                tool.name in [CYCLOMATIC_COMPLEXITY_OF_SECTION,
-                                              CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE,
-                                              MATCH_REGEX_PATTERN,
-                                              LIST_SECTIONS]]
+async def make_graph(client: MultiServerMCPClient,
+                     checkpointer: Optional[BaseCheckpointSaver] = None,
+                     input_source: Optional[InputSource] = None,
+                     neo4j_ops: Optional[Neo4jOperations] = None,
+                     session_pool: Optional[McpSessionPool] = None,
+                     tool_cache: Optional[ToolResultCache] = None) -> AsyncGenerator[CompiledStateGraph, Any]:
+    # Tools call through a pool of persistent MCP sessions instead of starting a server process per call.
+    # Without a shared pool, the graph warms up its own and shuts it down when the graph is closed.
+    # Likewise for the cache of deterministic tool results and the Neo4j driver saving inference trees.
+    async with AsyncExitStack() as owned_resources:
+        if session_pool is None:
+            session_pool = await owned_resources.enter_async_context(mcp_session_pool(client))
+        if tool_cache is None:
+            tool_cache = tool_result_cache_from_env()
+            if tool_cache is not None:
+                owned_resources.callback(tool_cache.close)
+        if neo4j_ops is None and inference_tree_persistence_enabled():
+            neo4j_ops = neo4j_operations_from_env()
+            owned_resources.callback(neo4j_ops.close)
+        mcp_tools = cached_tools(await session_pool.get_tools(), tool_cache)
+        async with graph_over_tools(mcp_tools, checkpointer, input_source, neo4j_ops) as graph:
+            yield graph
+
+
+@asynccontextmanager
+async def graph_over_tools(mcp_tools: list[BaseTool],
+                           checkpointer: Optional[BaseCheckpointSaver] = None,
+                           input_source: Optional[InputSource] = None,
+                           neo4j_ops: Optional[Neo4jOperations] = None) -> AsyncGenerator[CompiledStateGraph, Any]:
+    # Each node is bound only the tools it needs (see NODE_TOOLS), so its calls don't carry every tool schema
+    inference_tree_building_tools = tools_for(DECOMPOSE_HYPOTHESIS, mcp_tools)
+    evidence_gathering_tools = tools_for(VISIT_EVIDENCE, mcp_tools)
     # print(mcp_tools)
     # base_llm = ollama_model()
     base_llm = anthropic_model()
     # base_llm = bedrock_model()
     # await random_test(base_llm)
-    llm_with_tool = base_llm.bind_tools(mcp_tools)
-    inference_tree_builder_llm = base_llm.bind_tools(inference_tree_building_tools)
+    # With a large tool catalogue, open-ended nodes bind only the tools whose embeddings best match the prompt
+    tool_retrieval = tool_retrieval_from_env(mcp_tools)
+    inference_tree_builder_llm = llm_for(DECOMPOSE_HYPOTHESIS, base_llm, mcp_tools)
     # evidence_gatherer_llm = base_llm.bind_tools(evidence_gathering_tools)
     # llm_with_tool = bedrock_model().bind_tools(mcp_tools)
-    agent_decider = reverse_engineering_step_decider(llm_with_tool)
-    lead = reverse_engineering_lead(llm_with_tool)
-    evidence_gatherer = collect_data_for_hypothesis(llm_with_tool)
-    hypothesizer = hypothesize(llm_with_tool)
+    agent_decider = reverse_engineering_step_decider(llm_for(EXECUTIVE_AGENT, base_llm, mcp_tools))
+    input_source = input_source if input_source is not None else input_source_from_env()
+    # The codebase overview is fetched while the user is still at the first prompt, so hypothesizing can
+    # start from it directly
+    profile_prefetch = asyncio.create_task(prefetch_codebase_profile(mcp_tools)) \
+        if os.environ.get(CODEBASE_PROFILE_PREFETCH, "true").lower() == "true" else None
+    lead = reverse_engineering_lead(llm_for(EXECUTIVE_AGENT, base_llm, mcp_tools), input_source)
+    evidence_gatherer = collect_data_for_hypothesis(llm_for(COLLECT_DATA_FOR_HYPOTHESIS, base_llm, mcp_tools))
+    hypothesizer = hypothesize(llm_for(HYPOTHESIZE, base_llm, mcp_tools))
+    posterior_aggregation = aggregation_strategy(os.environ.get(POSTERIOR_AGGREGATION, SUMMED_EVIDENCE))
+    min_path_contribution = float(os.environ.get(MIN_PATH_CONTRIBUTION, "0"))
+    breadth_parallel_expansion = os.environ.get(INFERENCE_TREE_EXPANSION,
+                                                DEPTH_FIRST_EXPANSION) == BREADTH_PARALLEL_EXPANSION
+    tool_latencies = ToolLatencies()
+    if os.environ.get(EVIDENCE_SCHEDULING, TREE_ORDER_SCHEDULING) == VALUE_OF_INFORMATION_SCHEDULING:
+        scheduler = EvidenceScheduler(tool_latencies, float(os.environ.get(ROOT_INTERVAL_WIDTH_THRESHOLD, "0.1")),
+                                      strategy=posterior_aggregation)
+        validation_post_exec = schedule_next_evidence_build(scheduler)
+    else:
+        validation_post_exec = validate_hypothesis_post_exec
+    tree_store = None
+    if inference_tree_persistence_enabled():
+        # Graphs running side by side can share one driver, and with it one connection pool
+        if neo4j_ops is None:
+            raise ValueError(f"{INFERENCE_TREE_PERSISTENCE} needs the Neo4j operations to save trees with")
+        tree_store = InferenceTreeOperations(neo4j_ops)
+        tree_store.create_constraints()
+
+    def persisted(node_function, with_structure: bool = True):
+        return persisting(node_function, tree_store, with_structure) if tree_store is not None else node_function
 
     workflow = StateGraph(CodeExplorerState)
 
     workflow.add_node(EXECUTIVE_AGENT, lead)
     workflow.add_node(DONT_KNOW, fallback)
     workflow.add_node(COLLECT_DATA_FOR_HYPOTHESIS, evidence_gatherer)
-    workflow.add_node(HYPOTHESIS_GATHER_START, hypothesis_exec)
+    workflow.add_node(HYPOTHESIS_GATHER_START, hypothesis_exec_build(profile_prefetch))
     workflow.add_node(HYPOTHESIZE, hypothesizer)
-    workflow.add_node(EXPLORE_FREELY, free_explore(llm_with_tool))
-    workflow.add_node(SYSTEM_QUERY, system_query(llm_with_tool, mcp_tools))
-    workflow.add_node(BUILD_INFERENCE_TREE_INIT, build_inference_tree_init_node)
+    workflow.add_node(EXPLORE_FREELY, free_explore(llm_for(EXPLORE_FREELY, base_llm, mcp_tools, tool_retrieval)))
+    workflow.add_node(SYSTEM_QUERY, system_query(llm_for(SYSTEM_QUERY, base_llm, mcp_tools), mcp_tools))
+    workflow.add_node(BUILD_INFERENCE_TREE_INIT, build_inference_tree_init_build(input_source))
     workflow.add_node(DECOMPOSE_HYPOTHESIS,
                       decompose_hypothesis(inference_tree_builder_llm, inference_tree_building_tools))
     workflow.add_node(BUILD_INFERENCE_NODE_BUILD, build_inference_node_build)
-    workflow.add_node(INFERENCE_TREE_BUILD_STEP_CALCULATOR, inference_tree_build_step_calculator)
-    workflow.add_node(VALIDATE_HYPOTHESIS_INIT, validate_hypothesis_init)
+    workflow.add_node(EXPAND_INFERENCE_FRONTIER,
+                      persisted(expand_inference_frontier_build(inference_tree_builder_llm,
+                                                                inference_tree_building_tools)),
+                      retry=RetryPolicy(retry_on=InternalServerError, initial_interval=10))
+    workflow.add_node(INFERENCE_TREE_BUILD_STEP_CALCULATOR, persisted(inference_tree_build_step_calculator))
+    workflow.add_node(VALIDATE_HYPOTHESIS_INIT, validate_hypothesis_init_build(posterior_aggregation, min_path_contribution))
     workflow.add_node(VALIDATE_HYPOTHESIS_PRE_EXEC, validate_hypothesis_pre_exec)
-    workflow.add_node(VALIDATE_HYPOTHESIS_POST_EXEC, validate_hypothesis_post_exec)
+    workflow.add_node(VALIDATE_HYPOTHESIS_POST_EXEC, validation_post_exec)
     workflow.add_node(VISIT_HYPOTHESIS, visit_hypothesis)
-    workflow.add_node(VISIT_EVIDENCE, visit_evidence_build(base_llm, evidence_gathering_tools),
+    # Validation may run on a pruned tree (MIN_PATH_CONTRIBUTION), so it saves beliefs without the structure
+    workflow.add_node(VISIT_EVIDENCE, persisted(visit_evidence_build(base_llm, evidence_gathering_tools,
+                                                                    posterior_aggregation, tool_latencies),
+                                                with_structure=False),
                       retry=RetryPolicy(retry_on=InternalServerError, initial_interval=10))
-    workflow.add_node(UPDATE_POSTERIORS, update_posteriors)
+    workflow.add_node(UPDATE_POSTERIORS, persisted(update_posteriors_build(posterior_aggregation),
+                                                   with_structure=False))
 
     workflow.add_node(DATA_FOR_HYPOTHESIS_TOOL, ToolNode(mcp_tools, handle_tool_errors=True))
     workflow.add_node(SAVE_HYPOTHESES_TOOL, ToolNode(mcp_tools, handle_tool_errors=True))
@@ -162,7 +248,10 @@ async def make_graph(client: MultiServerMCPClient) -> AsyncGenerator[CompiledSta
         EXIT_DECISION: END,
         "default": DONT_KNOW,
     })
-    workflow.add_edge(HYPOTHESIS_GATHER_START, COLLECT_DATA_FOR_HYPOTHESIS)
+    workflow.add_conditional_edges(HYPOTHESIS_GATHER_START, hypothesize_from_profile_or_collect_data, {
+        HYPOTHESIZE_FROM_PROFILE_DECISION: HYPOTHESIZE,
+        COLLECT_DATA_DECISION: COLLECT_DATA_FOR_HYPOTHESIS
+    })
     workflow.add_conditional_edges(COLLECT_DATA_FOR_HYPOTHESIS, tools_condition, {
         "tools": DATA_FOR_HYPOTHESIS_TOOL,
         END: EXECUTIVE_AGENT
@@ -181,7 +270,18 @@ async def make_graph(client: MultiServerMCPClient) -> AsyncGenerator[CompiledSta
         END: EXECUTIVE_AGENT
     })
 
-    workflow.add_edge(BUILD_INFERENCE_TREE_INIT, DECOMPOSE_HYPOTHESIS)
+    tree_build_start = EXPAND_INFERENCE_FRONTIER if breadth_parallel_expansion else DECOMPOSE_HYPOTHESIS
+    if tree_store is not None:
+        workflow.add_node(REUSE_SAVED_INFERENCE_TREE,
+                          reuse_saved_inference_tree_build(tree_store, breadth_parallel_expansion))
+        workflow.add_edge(BUILD_INFERENCE_TREE_INIT, REUSE_SAVED_INFERENCE_TREE)
+        workflow.add_conditional_edges(REUSE_SAVED_INFERENCE_TREE, inference_tree_build_step_decider, {
+            TREE_INCOMPLETE: tree_build_start,
+            TREE_COMPLETE: EXECUTIVE_AGENT,
+            "default": tree_build_start
+        })
+    else:
+        workflow.add_edge(BUILD_INFERENCE_TREE_INIT, tree_build_start)
     workflow.add_conditional_edges(DECOMPOSE_HYPOTHESIS, tools_condition, {
         "tools": BREAKDOWN_HYPOTHESIS_TOOL,
         END: EXECUTIVE_AGENT
@@ -211,15 +311,25 @@ async def make_graph(client: MultiServerMCPClient) -> AsyncGenerator[CompiledSta
         VISIT_EVIDENCE_DECISION: VISIT_EVIDENCE,
         END: EXECUTIVE_AGENT
     })
+    workflow.add_conditional_edges(EXPAND_INFERENCE_FRONTIER, inference_tree_build_step_decider, {
+        TREE_INCOMPLETE: EXPAND_INFERENCE_FRONTIER,
+        TREE_COMPLETE: EXECUTIVE_AGENT,
+        "default": EXECUTIVE_AGENT
+    })
     workflow.add_conditional_edges(INFERENCE_TREE_BUILD_STEP_CALCULATOR, inference_tree_build_step_decider, {
         TREE_INCOMPLETE: DECOMPOSE_HYPOTHESIS,
         TREE_COMPLETE: EXECUTIVE_AGENT,
         "default": EXECUTIVE_AGENT
     })
 
-    graph = workflow.compile()
+    # With a checkpointer, every step is saved under the invocation's thread id and can be resumed after a failure
+    graph = workflow.compile(checkpointer=checkpointer)
     graph.name = "My Graph"
-    yield graph
+    try:
+        yield graph
+    finally:
+        if profile_prefetch is not None:
+            profile_prefetch.cancel()
 
 
 async def random_test(base_llm):
@@ -243,14 +353,54 @@ Tools:
     exit(0)
 
 
-async def start_task_graph(user_input: str, graph: CompiledStateGraph) -> None:
-    await graph.ainvoke({"messages":
+def session_config(thread_id: Optional[str]) -> dict[str, Any]:
+    config: dict[str, Any] = {"recursion_limit": 500}
+    if thread_id is not None:
+        config["configurable"] = {"thread_id": thread_id}
+    return config
+
+
+def inference_tree_persistence_enabled() -> bool:
+    return os.environ.get(INFERENCE_TREE_PERSISTENCE, "false").lower() == "true"
+
+
+def neo4j_operations_from_env() -> Neo4jOperations:
+    return Neo4jOperations(os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                           os.getenv("NEO4J_USER", "neo4j"),
+                           os.getenv("NEO4J_PASSWORD", "password"),
+                           id_provider=UuidProvider())
+
+
+async def start_task_graph(user_input: str, graph: CompiledStateGraph,
+                           thread_id: Optional[str] = None) -> dict[str, Any]:
+    final_state = await drive_session(graph, {"messages":
         [
             """
             You are part of a reverse engineering pipeline looking at a HLASM codebase. Help navigate the user in understanding this code.
             """,
-            HumanMessage(content=user_input)]}, {"recursion_limit": 500})
+            HumanMessage(content=user_input)]}, thread_id)
     print("Goodbye!")
+    return final_state
+
+
+async def resume_task_graph(graph: CompiledStateGraph, thread_id: str) -> None:
+    # Continues a checkpointed session from its last completed step
+    await drive_session(graph, None, thread_id)
+    print("Goodbye!")
+
+
+# Key under which ainvoke returns the interrupts a paused graph is waiting on
+INTERRUPT_KEY = "__interrupt__"
+
+
+async def drive_session(graph: CompiledStateGraph, graph_input: Any, thread_id: Optional[str]) -> dict[str, Any]:
+    # With InterruptInput the graph pauses whenever it needs user input; answer from the console and resume
+    config = session_config(thread_id)
+    result = await graph.ainvoke(graph_input, config)
+    while result and INTERRUPT_KEY in result:
+        answer = await ConsoleInput().read(result[INTERRUPT_KEY][0].value)
+        result = await graph.ainvoke(Command(resume=answer), config)
+    return result
 
 
 async def run_thing() -> None:
@@ -0,0 +1,77 @@
+import asyncio
+import os
+from typing import Optional, Protocol, runtime_checkable
+
+from langgraph.types import interrupt
+
+CONSOLE_INPUT = "console"
+SCRIPTED_INPUT = "script"
+INTERRUPT_INPUT = "interrupt"
+
+INPUT_SOURCE = "INPUT_SOURCE"
+INPUT_SCRIPT = "INPUT_SCRIPT"
+
+END_OF_INPUT = "quit"
+
+
+@runtime_checkable
+class InputSource(Protocol):
+    """Where the graph's interactive nodes get their user input from, without blocking the event loop."""
+
+    async def read(self, prompt: str) -> str:
+        ...
+
+
+class ConsoleInput(InputSource):
+    # Blocking stdin reads run on a worker thread, so MCP subprocess I/O and other tasks keep running
+    async def read(self, prompt: str) -> str:
+        return await asyncio.to_thread(input, prompt)
+
+
+class QueueInput(InputSource):
+    # Inputs pushed by another task (or pre-loaded from a script); once closed and drained, the session is ended
+    def __init__(self, inputs: Optional[list[str]] = None):
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        for line in inputs or []:
+            self.queue.put_nowait(line)
+
+    def put(self, line: str) -> None:
+        self.queue.put_nowait(line)
+
+    def close(self) -> None:
+        self.queue.put_nowait(None)
+
+    async def read(self, prompt: str) -> str:
+        line = await self.queue.get()
+        if line is None:
+            self.queue.put_nowait(None)
+            return END_OF_INPUT
+        print(f"{prompt}{line}")
+        return line
+
+
+def scripted_input(path: str) -> QueueInput:
+    # One input per line, e.g. a request followed by the hypothesis subject, relation and object
+    with open(path) as script:
+        source = QueueInput([line.rstrip("\n") for line in script])
+    source.close()
+    return source
+
+
+class InterruptInput(InputSource):
+    # Human-in-the-loop: pauses the graph with the prompt as the interrupt value; resume the thread with
+    # Command(resume=<answer>). Needs the graph to be compiled with a checkpointer.
+    async def read(self, prompt: str) -> str:
+        return interrupt(prompt)
+
+
+def input_source_from_env() -> InputSource:
+    source = os.environ.get(INPUT_SOURCE, CONSOLE_INPUT)
+    if source == SCRIPTED_INPUT:
+        return scripted_input(os.environ[INPUT_SCRIPT])
+    if source == INTERRUPT_INPUT:
+        return InterruptInput()
+    if source == CONSOLE_INPUT:
+        return ConsoleInput()
+    raise ValueError(f"Unknown input source '{source}', expected one of "
+                     f"{[CONSOLE_INPUT, SCRIPTED_INPUT, INTERRUPT_INPUT]}")
@@ -0,0 +1,160 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+
+MCP_SESSIONS_PER_SERVER = "MCP_SESSIONS_PER_SERVER"
+MCP_HEALTH_CHECK_INTERVAL_SECONDS = "MCP_HEALTH_CHECK_INTERVAL_SECONDS"
+
+
+class PooledServerSession:
+    # One long-lived session with an MCP server process. The session is opened and closed inside its own task,
+    # since the stdio transport must be torn down by the task which set it up.
+    def __init__(self, client: MultiServerMCPClient, server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.session: Optional[ClientSession] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stop: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        ready = asyncio.Event()
+        self.stop = asyncio.Event()
+        self.task = asyncio.create_task(self.hold(ready, self.stop))
+        ready_wait = asyncio.create_task(ready.wait())
+        await asyncio.wait([ready_wait, self.task], return_when=asyncio.FIRST_COMPLETED)
+        ready_wait.cancel()
+        if self.task.done():
+            # Surface the reason the server failed to start
+            self.task.result()
+
+    async def hold(self, ready: asyncio.Event, stop: asyncio.Event) -> None:
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                ready.set()
+                await stop.wait()
+        finally:
+            self.session = None
+
+    async def healthy(self) -> bool:
+        if self.session is None or self.task is None or self.task.done():
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=10)
+            return True
+        except Exception:
+            return False
+
+    async def restart(self) -> None:
+        print(f"Restarting MCP session with {self.server_name}")
+        await self.close()
+        await self.start()
+
+    async def close(self) -> None:
+        if self.stop is not None:
+            self.stop.set()
+        if self.task is not None:
+            try:
+                await self.task
+            except Exception as e:
+                print(f"MCP session with {self.server_name} ended with: {e}")
+
+
+class ServerSessionRouter:
+    """
+    Stands in for a ClientSession when loading a server's tools: every call is routed to an idle pooled
+    session of that server, which is health-checked and restarted (and the call retried once) if it died.
+    """
+
+    def __init__(self, sessions: list[PooledServerSession]):
+        self.idle: asyncio.Queue[PooledServerSession] = asyncio.Queue()
+        for session in sessions:
+            self.idle.put_nowait(session)
+
+    async def call_tool(self, *args, **kwargs) -> Any:
+        return await self.routed("call_tool", *args, **kwargs)
+
+    async def list_tools(self, *args, **kwargs) -> Any:
+        return await self.routed("list_tools", *args, **kwargs)
+
+    async def routed(self, method: str, *args, **kwargs) -> Any:
+        pooled = await self.idle.get()
+        try:
+            try:
+                return await getattr(pooled.session, method)(*args, **kwargs)
+            except Exception:
+                if await pooled.healthy():
+                    raise
+                await pooled.restart()
+                return await getattr(pooled.session, method)(*args, **kwargs)
+        finally:
+            self.idle.put_nowait(pooled)
+
+
+class McpSessionPool:
+    """
+    Keeps sessions_per_server persistent sessions (and hence server processes, e.g. one analyser JVM each) open
+    for every server configured on the client. The pool is warmed up on entry, idle sessions are pinged
+    periodically and restarted if they stopped responding, and concurrent tool calls are spread over them.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, sessions_per_server: int = 1,
+                 health_check_interval_seconds: float = 60):
+        self.client = client
+        self.sessions_per_server = sessions_per_server
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.sessions: dict[str, list[PooledServerSession]] = {}
+        self.routers: dict[str, ServerSessionRouter] = {}
+        self.health_check_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        for server_name in self.client.connections:
+            self.sessions[server_name] = [PooledServerSession(self.client, server_name)
+                                         for _ in range(self.sessions_per_server)]
+        await asyncio.gather(*(session.start() for sessions in self.sessions.values() for session in sessions))
+        self.routers = {server_name: ServerSessionRouter(sessions) for server_name, sessions in self.sessions.items()}
+        self.health_check_task = asyncio.create_task(self.check_health_periodically())
+
+    async def get_tools(self) -> list[BaseTool]:
+        tools_per_server = await asyncio.gather(*(load_mcp_tools(router) for router in self.routers.values()))
+        return [tool for tools in tools_per_server for tool in tools]
+
+    async def check_health_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval_seconds)
+            for router in self.routers.values():
+                # Only check sessions nobody is using; busy ones are checked when a call on them fails
+                for _ in range(router.idle.qsize()):
+                    pooled = router.idle.get_nowait()
+                    try:
+                        if not await pooled.healthy():
+                            await pooled.restart()
+                    except Exception as e:
+                        print(f"Could not restart MCP session with {pooled.server_name}: {e}")
+                    finally:
+                        router.idle.put_nowait(pooled)
+
+    async def close(self) -> None:
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+        await asyncio.gather(*(session.close() for sessions in self.sessions.values() for session in sessions))
+
+
+@asynccontextmanager
+async def mcp_session_pool(client: MultiServerMCPClient,
+                           sessions_per_server: Optional[int] = None) -> AsyncIterator[McpSessionPool]:
+    pool = McpSessionPool(client,
+                          sessions_per_server if sessions_per_server is not None
+                          else int(os.environ.get(MCP_SESSIONS_PER_SERVER, "1")),
+                          float(os.environ.get(MCP_HEALTH_CHECK_INTERVAL_SECONDS, "60")))
+    await pool.start()
+    try:
+        yield pool
+    finally:
+        await pool.close()
@@ -22,3 +22,5 @@ VALIDATE_HYPOTHESIS_INIT = "validate_hypothesis_init"
 VALIDATE_HYPOTHESIS_PRE_EXEC = "validate_hypothesis_pre_exec"
 VALIDATE_HYPOTHESIS_POST_EXEC = "validate_hypothesis_post_exec"
 UPDATE_POSTERIORS = "update_posterior"
+EXPAND_INFERENCE_FRONTIER = "expand_inference_frontier"
+REUSE_SAVED_INFERENCE_TREE = "reuse_saved_inference_tree"
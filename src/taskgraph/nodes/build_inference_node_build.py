@@ -37,7 +37,6 @@ def build_inference_node_build(state: CodeExplorerState) -> dict[str, Any]:
         print(f"Raw Evidences are: {all_children}")
         child_evidences = [as_evidence_inference_node(child) for child in all_children]
         print(f"Number of evidences is: {len(child_evidences)}")
-        state[INFERENCE_STACK_KEY][-1] = (node, len(child_evidences) - 1)
         node.add_all(child_evidences)
         # print(f"Inference stack after build: {state['inference_stack']}")
     elif tool_name == BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME:
@@ -46,12 +45,20 @@ def build_inference_node_build(state: CodeExplorerState) -> dict[str, Any]:
         sub_hypotheses = [as_hypothesis_inference_node(child) for child in all_children]
         print(f"Number of sub-hypotheses is: {len(sub_hypotheses)}")
         node.add_all(sub_hypotheses)
-        state[INFERENCE_STACK_KEY].append((sub_hypotheses[0], 0))
         # print(f"Inference stack after build: {state['inference_stack']}")
     return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
                              messages=state[MESSAGES_KEY], inference_stack=state[INFERENCE_STACK_KEY])
 
 
+def children_from(tool_message) -> list[InferenceNode]:
+    # Evidences or sub-hypotheses produced by one of the decomposition tools
+    if tool_message.name == CREATE_EVIDENCE_STRATEGY_MCP_TOOL_NAME:
+        return [as_evidence_inference_node(child) for child in parsed(tool_message.content)]
+    if tool_message.name == BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME:
+        return [as_hypothesis_inference_node(child) for child in parsed(tool_message.content)]
+    return []
+
+
 def parsed(tool_message_content: str | list[str, dict]):
     print(f"Parsing tool message: {tool_message_content}")
     tool_message_content = json.loads(tool_message_content)
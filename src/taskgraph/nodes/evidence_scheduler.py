@@ -0,0 +1,133 @@
+from typing import Any, Optional
+
+import numpy as np
+
+from src.domain.aggregation_strategy import AggregationStrategy, SummedEvidence, as_count
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief, equally_likely
+from src.domain.evidence import Evidence
+from src.domain.flat_inference_tree import FlatInferenceTree
+from src.domain.induction_node import InferenceNode
+from src.domain.tree_traversal import TreeTraversal
+from src.taskgraph.nodes.types import LanggraphNode
+from src.taskgraph.state import CodeExplorerState
+from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, BASE_HYPOTHESIS_KEY, \
+    VISITED_EVIDENCE_KEY
+
+UNIFORM_VARIANCE = 1 / 12
+# The belief every Evidence starts with when a hypothesis is decomposed
+EVIDENCE_PRIOR = equally_likely()
+
+
+class ToolLatencies:
+    def __init__(self):
+        self.total_seconds: dict[str, float] = {}
+        self.call_counts: dict[str, int] = {}
+
+    def record(self, tool_names: list[str], seconds: float) -> None:
+        # An evidence visit's wall time is shared equally between the tool calls it made
+        for tool_name in tool_names:
+            self.total_seconds[tool_name] = self.total_seconds.get(tool_name, 0.0) + seconds / len(tool_names)
+            self.call_counts[tool_name] = self.call_counts.get(tool_name, 0) + 1
+
+    def mean(self, tool_name: str) -> Optional[float]:
+        if tool_name not in self.call_counts:
+            return None
+        return self.total_seconds[tool_name] / self.call_counts[tool_name]
+
+    def overall_mean(self) -> float:
+        calls = sum(self.call_counts.values())
+        return sum(self.total_seconds.values()) / calls if calls else 1.0
+
+
+class EvidenceScheduler:
+    """
+    Orders Evidence leaves by value of information: the expected change in the root's posterior mean from
+    gathering that evidence, per expected second spent gathering it. Gathering stops once the root's credible
+    interval, from the evidence observed so far, is narrow enough.
+    """
+
+    def __init__(self, latencies: ToolLatencies, max_interval_width: float, credible_mass: float = 0.95,
+                 strategy: AggregationStrategy = SummedEvidence()):
+        self.latencies = latencies
+        self.max_interval_width = max_interval_width
+        self.credible_mass = credible_mass
+        self.strategy = strategy
+
+    def expected_cost(self, evidence: Evidence) -> float:
+        # Evidence descriptions name the tools the decomposition intends to use; unknown tools cost the average
+        overall_mean = self.latencies.overall_mean()
+        tool_costs = [self.latencies.mean(tool_name) for tool_name in self.latencies.call_counts
+                      if tool_name in evidence.evidence_description]
+        return sum(tool_costs) if tool_costs else overall_mean
+
+    def value_of_information(self, leaf: InferenceNode) -> float:
+        # One more observation moves a Beta mean by 2 * variance in expectation; it reaches the root scaled
+        # by the product of contributions along the path
+        path_weight = leaf.contribution()
+        for ancestor in leaf.ancestors():
+            if ancestor.parent is not None:
+                path_weight *= ancestor.contribution()
+        expected_shift = 2 * belief_variance(leaf.node.belief) * path_weight
+        return expected_shift / max(self.expected_cost(leaf.node), 1e-6)
+
+    def observed_root_belief(self, root: InferenceNode, visited_ids: list[str]) -> BetaBernoulliBelief:
+        # The root's belief aggregated from observations only. The prior pseudo-counts of every Evidence would
+        # otherwise compound up the levels into a narrow interval before any evidence has been gathered, so
+        # unvisited leaves count for nothing and visited ones for what gathering added to their prior.
+        flat_tree = FlatInferenceTree.from_tree(root)
+        leaves = np.flatnonzero(flat_tree.leaves())
+        visited = np.array([flat_tree.nodes[leaf].id in visited_ids for leaf in leaves], dtype=bool)
+        flat_tree.alphas[leaves] = np.where(visited, np.maximum(flat_tree.alphas[leaves] - EVIDENCE_PRIOR.alpha, 0), 0)
+        flat_tree.betas[leaves] = np.where(visited, np.maximum(flat_tree.betas[leaves] - EVIDENCE_PRIOR.beta, 0), 0)
+        flat_tree.aggregate(self.strategy)
+        return BetaBernoulliBelief(as_count(flat_tree.alphas[0]), as_count(flat_tree.betas[0]))
+
+    def root_settled(self, root: InferenceNode, visited_ids: list[str]) -> bool:
+        if not visited_ids:
+            return False
+        observed_belief = self.observed_root_belief(root, visited_ids)
+        interval = FlatInferenceTree.from_beliefs([observed_belief]).credible_intervals(self.credible_mass)[0]
+        return interval[1] - interval[0] < self.max_interval_width
+
+    def next_evidence(self, root: InferenceNode, visited_ids: list[str]) -> Optional[InferenceNode]:
+        if self.root_settled(root, visited_ids):
+            return None
+        pending = [leaf for leaf in evidence_leaves(root) if leaf.id not in visited_ids]
+        if not pending:
+            return None
+        return max(pending, key=self.value_of_information)
+
+
+def belief_variance(belief: BetaBernoulliBelief) -> float:
+    total = belief.alpha + belief.beta
+    if total == 0:
+        return UNIFORM_VARIANCE
+    return belief.alpha * belief.beta / (total * total * (total + 1))
+
+
+def evidence_leaves(root: InferenceNode) -> list[InferenceNode]:
+    return [inference_node for inference_node in root.traverse() if isinstance(inference_node.node, Evidence)]
+
+
+def schedule_next_evidence_build(scheduler: EvidenceScheduler) -> LanggraphNode:
+    # Replaces validate_hypothesis_post_exec: instead of stepping the traversal in order, each step positions
+    # it at the most valuable pending Evidence, or empties it once the root is settled or nothing is left
+    def schedule_next_evidence(state: CodeExplorerState) -> dict[str, Any]:
+        print("In Evidence Scheduling")
+        print("=====================================")
+        root: InferenceNode = state[BASE_HYPOTHESIS_KEY]
+        visited_ids = state.get(VISITED_EVIDENCE_KEY) or []
+        next_leaf = scheduler.next_evidence(root, visited_ids)
+        if next_leaf is None:
+            print(f"Stopping evidence gathering after {len(visited_ids)} evidences, root belief is {root.node.belief}")
+            recursion_stack = []
+        else:
+            print(f"Next evidence: {next_leaf.just_str()}")
+            recursion_stack = TreeTraversal.at(next_leaf).checkpoint()
+            visited_ids = visited_ids + [next_leaf.id]
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY], inference_stack=[],
+                                 base_hypothesis=root, recursion_stack=recursion_stack,
+                                 visited_evidence=visited_ids)
+
+    return schedule_next_evidence
@@ -1,17 +1,18 @@
-from typing import Any
+from typing import Any, Callable, Awaitable
 
-from src.taskgraph.nodes.types import LanggraphNode
+from src.taskgraph.input_source import InputSource
 from src.taskgraph.router_constants import EXIT_DECISION
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import MESSAGES_KEY
 
 
-def reverse_engineering_lead(tool_llm) -> LanggraphNode:
-    def run_agent(state: CodeExplorerState) -> dict[str, Any]:
+def reverse_engineering_lead(tool_llm, input_source: InputSource) -> Callable[
+    [CodeExplorerState], Awaitable[dict[str, Any]]]:
+    async def run_agent(state: CodeExplorerState) -> dict[str, Any]:
         print("============IN LEAD===============")
         print(state)
         while True:
-            user_input: str = input("What do you want to do? ")
+            user_input: str = await input_source.read("What do you want to do? ")
             if user_input.lower() in ["quit", "exit", "q"]:
                 return CodeExplorerState(input=user_input, current_request=user_input,
                                          messages=[EXIT_DECISION])
@@ -0,0 +1,67 @@
+import asyncio
+import sys
+from typing import Any, Callable, Awaitable
+
+from langchain_core.tools import BaseTool
+
+from src.domain.hypothesis import Hypothesis
+from src.domain.induction_node import InferenceNode
+from src.taskgraph.nodes.build_inference_node_build import children_from
+from src.taskgraph.nodes.decompose_hypothesis import breakdown_prompts
+from src.taskgraph.nodes.inference_tree_decisions import TREE_COMPLETE, TREE_INCOMPLETE
+from src.taskgraph.nodes.types import LLM
+from src.taskgraph.state import CodeExplorerState
+from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, INFERENCE_STACK_KEY, \
+    BASE_HYPOTHESIS_KEY
+
+
+def expand_inference_frontier_build(tool_llm: LLM, tools: list[BaseTool]) -> Callable[
+    [CodeExplorerState], Awaitable[dict[str, Any]]]:
+    # Breadth-parallel alternative to decompose_hypothesis -> breakdown tool -> build_inference_node_build:
+    # the inference stack holds the open hypotheses of one level as (node, depth), every one of them is
+    # decomposed concurrently, and their sub-hypotheses form the next level
+    tools_by_name = {tool.name: tool for tool in tools}
+
+    async def decompose(inference_node: InferenceNode, depth: int) -> list[InferenceNode]:
+        prompt, generic_breakdown_prompt = breakdown_prompts(inference_node.node, depth + 1, tools)
+        response = await tool_llm.ainvoke([prompt, generic_breakdown_prompt])
+        if not response.tool_calls:
+            print(f"No decomposition tool was called for {inference_node.just_str()}")
+            return []
+        tool_call = response.tool_calls[0]
+        if tool_call["name"] not in tools_by_name:
+            print(f"Unknown decomposition tool {tool_call['name']} was called for {inference_node.just_str()}")
+            return []
+        # A failing tool leaves only this hypothesis undecomposed, not the rest of the frontier
+        try:
+            tool_message = await tools_by_name[tool_call["name"]].ainvoke(tool_call)
+            return children_from(tool_message)
+        except Exception as e:
+            print(f"Decomposition tool {tool_call['name']} failed for {inference_node.just_str()}: {e}")
+            return []
+
+    async def expand_inference_frontier(state: CodeExplorerState) -> dict[str, Any]:
+        frontier: list[tuple[InferenceNode, int]] = state[INFERENCE_STACK_KEY]
+        print(f"Expanding {len(frontier)} hypotheses at depth {frontier[0][1]} concurrently")
+        print("============================================")
+        root = frontier[0][0] if frontier[0][1] == 0 else state[BASE_HYPOTHESIS_KEY]
+        decompositions = await asyncio.gather(*(decompose(inference_node, depth) for inference_node, depth in frontier))
+
+        next_frontier = []
+        for (inference_node, depth), children in zip(frontier, decompositions):
+            if not children:
+                # Leave the tree traversable: a hypothesis without evidence cannot be validated
+                if inference_node.parent is not None:
+                    print(f"Dropping undecomposed hypothesis: {inference_node.just_str()}")
+                    inference_node.parent.children.remove(inference_node)
+                continue
+            inference_node.add_all(children)
+            next_frontier.extend((child, depth + 1) for child in children if isinstance(child.node, Hypothesis))
+
+        root.write_tree(sys.stdout)
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY], inference_stack=next_frontier,
+                                 tree_build_status=TREE_INCOMPLETE if next_frontier else TREE_COMPLETE,
+                                 base_hypothesis=root)
+
+    return expand_inference_frontier
@@ -1,16 +1,23 @@
-from typing import Any
+import asyncio
+from typing import Any, Optional, Callable, Awaitable
 
 from langchain_core.messages import HumanMessage
 
+from src.taskgraph.codebase_profile import profile_summary
 from src.taskgraph.nodes.types import LLM, LanggraphNode
+from src.taskgraph.router_constants import HYPOTHESIZE_FROM_PROFILE_DECISION, COLLECT_DATA_DECISION
 from src.taskgraph.state import CodeExplorerState
-from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY
+from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, CODEBASE_PROFILE_KEY
 
 
 def hypothesize(tool_llm: LLM) -> LanggraphNode:
     def run_agent(state: CodeExplorerState) -> dict[str, Any]:
         print("IN HYPOTHESIZER....================================================================")
         messages = state[MESSAGES_KEY]
+        # With a prefetched profile, that is the evidence gathered so far, instead of an LLM-driven tool round
+        profile = state.get(CODEBASE_PROFILE_KEY)
+        if profile:
+            messages = messages + [HumanMessage(f"Profile of the codebase:\n{profile_summary(profile)}")]
         human_message = HumanMessage("""
             The previous steps have gathered some evidence of the codebase to gather hypotheses.
             Use the evidence to gather upto 5 hypotheses about the codebase. Do not start gathering any
@@ -29,7 +36,19 @@ def hypothesize(tool_llm: LLM) -> LanggraphNode:
 
     return run_agent
 
-def hypothesis_exec(state: CodeExplorerState):
-    print("============IN HYPO EXEC=================")
-    return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
-                             messages=state[MESSAGES_KEY] + [])
+def hypothesis_exec_build(profile_prefetch: Optional[asyncio.Task]) -> Callable[
+    [CodeExplorerState], Awaitable[dict[str, Any]]]:
+    async def hypothesis_exec(state: CodeExplorerState) -> dict[str, Any]:
+        print("============IN HYPO EXEC=================")
+        profile = state.get(CODEBASE_PROFILE_KEY)
+        if not profile and profile_prefetch is not None:
+            # Started when the graph was made, so usually finished by now
+            profile = await asyncio.shield(profile_prefetch)
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY] + [], codebase_profile=profile)
+
+    return hypothesis_exec
+
+
+def hypothesize_from_profile_or_collect_data(state: CodeExplorerState) -> str:
+    return HYPOTHESIZE_FROM_PROFILE_DECISION if state.get(CODEBASE_PROFILE_KEY) else COLLECT_DATA_DECISION
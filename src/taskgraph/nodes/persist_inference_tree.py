@@ -0,0 +1,76 @@
+import inspect
+import sys
+from typing import Any, Callable
+
+from src.domain.beta_bernoulli_belief import equally_likely
+from src.domain.hypothesis import Hypothesis
+from src.domain.induction_node import InferenceNode
+from src.domain.inference_tree_operations import InferenceTreeOperations
+from src.domain.tree_traversal import TreeTraversal
+from src.taskgraph.nodes.inference_tree_decisions import TREE_COMPLETE, TREE_INCOMPLETE
+from src.taskgraph.nodes.types import LanggraphNode
+from src.taskgraph.state import CodeExplorerState
+from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, INFERENCE_STACK_KEY, \
+    BASE_HYPOTHESIS_KEY
+
+
+def persisting(node_function: Callable, tree_store: InferenceTreeOperations, with_structure: bool = True) -> Callable:
+    # Wraps a graph node so that, after it runs, whichever nodes of the inference tree it changed are saved.
+    # Validation nodes save beliefs only, so subtrees pruned for the validation are not deleted from the store.
+    def save(state: CodeExplorerState, result: dict[str, Any]) -> None:
+        root = result.get(BASE_HYPOTHESIS_KEY, state.get(BASE_HYPOTHESIS_KEY))
+        if root is not None:
+            print(f"Saved {tree_store.save_tree(root, with_structure)} changed inference tree nodes")
+
+    if inspect.iscoroutinefunction(node_function):
+        async def persisted_async(state: CodeExplorerState) -> dict[str, Any]:
+            result = await node_function(state)
+            save(state, result)
+            return result
+
+        return persisted_async
+
+    def persisted(state: CodeExplorerState) -> dict[str, Any]:
+        result = node_function(state)
+        save(state, result)
+        return result
+
+    return persisted
+
+
+def reuse_saved_inference_tree_build(tree_store: InferenceTreeOperations, breadth_parallel: bool) -> LanggraphNode:
+    # Picks up a previously saved tree for the same root hypothesis instead of decomposing it again. A tree
+    # whose building was interrupted resumes from its undecomposed hypotheses.
+    def reuse_saved_inference_tree(state: CodeExplorerState) -> dict[str, Any]:
+        hypothesis: Hypothesis = state[INFERENCE_STACK_KEY][0][0].node
+        root_id = tree_store.find_tree_root(hypothesis.subject.name, hypothesis.relation, hypothesis.object.name)
+        root = tree_store.load_tree(root_id) if root_id is not None else None
+        if root is None:
+            print("No saved inference tree for this hypothesis, decomposing it")
+            return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                     messages=state[MESSAGES_KEY], inference_stack=state[INFERENCE_STACK_KEY],
+                                     tree_build_status=TREE_INCOMPLETE)
+
+        print("Reusing saved inference tree")
+        # Only the decomposition is reused: the saved beliefs already count a previous session's evidence,
+        # which validating again would count a second time
+        for inference_node in root.traverse():
+            inference_node.node.belief = equally_likely()
+            inference_node.children_terms = None
+        root.write_tree(sys.stdout)
+        open_hypotheses: list[InferenceNode] = [inference_node for inference_node in root.traverse()
+                                                if isinstance(inference_node.node, Hypothesis)
+                                                and not inference_node.children]
+        if not open_hypotheses:
+            inference_stack = []
+        elif breadth_parallel:
+            inference_stack = [(inference_node, sum(1 for _ in inference_node.ancestors()))
+                               for inference_node in open_hypotheses]
+        else:
+            inference_stack = TreeTraversal.at(open_hypotheses[0]).checkpoint()
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY], inference_stack=inference_stack,
+                                 tree_build_status=TREE_INCOMPLETE if open_hypotheses else TREE_COMPLETE,
+                                 base_hypothesis=root)
+
+    return reuse_saved_inference_tree
@@ -15,6 +15,8 @@ def reverse_engineering_step_decider(tool_llm) -> LanggraphDeciderNode:
             return EXIT_DECISION
         elif user_input.content.strip() == "v":
             return VALIDATE_HYPOTHESIS_DECISION
+        elif user_input.content.strip() == "t":
+            return BUILD_INFERENCE_TREE_DECISION
 
         prompt = f"""         The user request is: "{state['current_request']}".
                               Based on the request, decide which agent you wish to activate. Your choices are:
@@ -3,6 +3,7 @@ from typing import Any
 from src.taskgraph.nodes.types import LLM
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY
+from src.taskgraph.tool_selection import compact_tool_descriptions
 
 
 def system_query(tool_llm: LLM, tools):
@@ -11,7 +12,7 @@ def system_query(tool_llm: LLM, tools):
         print("=============================")
         print(state)
         response = tool_llm.invoke([
-            f"The list of Model Context Protocol tools are: {tools}. Answer the following request without using any tools: {state[CURRENT_REQUEST_KEY]}"])
+            f"The list of Model Context Protocol tools are:\n{compact_tool_descriptions(tools)}\nAnswer the following request without using any tools: {state[CURRENT_REQUEST_KEY]}"])
         print(response.content)
         return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
                                  messages=state[MESSAGES_KEY] + [response])
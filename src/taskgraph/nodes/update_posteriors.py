@@ -1,41 +1,65 @@
-from functools import reduce
+import sys
 from typing import Any
 
-from src.domain.beta_bernoulli_belief import BetaBernoulliBelief, no_evidence
+import numpy as np
+
+from src.domain.aggregation_strategy import AggregationStrategy, SummedEvidence, as_count
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.flat_inference_tree import FlatInferenceTree
+from src.taskgraph.nodes.types import LanggraphNode
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, BASE_HYPOTHESIS_KEY, \
     RECURSION_STACK_KEY
 from src.domain.induction_node import InferenceNode
 
 
-def aggregate_distributions(total_belief: BetaBernoulliBelief, belief: BetaBernoulliBelief) -> BetaBernoulliBelief:
-    return BetaBernoulliBelief(total_belief.alpha + belief.alpha, total_belief.beta + belief.beta)
-
+def update_posteriors_recursively(inference_node: InferenceNode,
+                                  strategy: AggregationStrategy = SummedEvidence()):
+    # Array-based bottom-up pass: no Python recursion, so deep trees cannot hit the recursion limit
+    flat_tree = FlatInferenceTree.from_tree(inference_node)
+    flat_tree.write_back(flat_tree.aggregate(strategy))
+    return inference_node.node.belief
 
-def weighted(belief: BetaBernoulliBelief) -> BetaBernoulliBelief:
-    return BetaBernoulliBelief(belief.alpha * 2, belief.beta)
 
+def propagate_posterior_change(inference_node: InferenceNode, previous_belief: BetaBernoulliBelief,
+                               strategy: AggregationStrategy = SummedEvidence()) -> None:
+    # Re-aggregates only the ancestors of a changed node, applying the change as a delta to each cached sum
+    child, child_previous_belief = inference_node, previous_belief
+    parent = inference_node.parent
+    while parent is not None:
+        parent_previous_belief = parent.node.belief
+        if parent.children_terms is None:
+            parent.children_terms = tuple(float(np.sum(term)) for term in strategy.terms(
+                np.array([sibling.node.belief.alpha for sibling in parent.children], dtype=np.float64),
+                np.array([sibling.node.belief.beta for sibling in parent.children], dtype=np.float64),
+                np.array([sibling.contribution() for sibling in parent.children], dtype=np.float64)))
+        else:
+            weight = np.float64(child.contribution())
+            current_terms = strategy.terms(np.float64(child.node.belief.alpha), np.float64(child.node.belief.beta),
+                                           weight)
+            previous_terms = strategy.terms(np.float64(child_previous_belief.alpha),
+                                            np.float64(child_previous_belief.beta), weight)
+            parent.children_terms = tuple(float(total + current - previous) for total, current, previous in
+                                          zip(parent.children_terms, current_terms, previous_terms))
+        alpha, beta = strategy.pooled(*(np.float64(term) for term in parent.children_terms))
+        parent.node.belief = BetaBernoulliBelief(as_count(alpha), as_count(beta))
+        child, child_previous_belief, parent = parent, parent_previous_belief, parent.parent
 
-def update_posteriors_recursively(inference_node: InferenceNode):
-    if len(inference_node.children) == 0:
-        return inference_node.node.belief
-    total_belief_for_node = weighted(
-        reduce(lambda agg, prb: aggregate_distributions(agg, update_posteriors_recursively(prb)),
-               inference_node.children,
-               no_evidence()))
-    inference_node.node.belief = total_belief_for_node
-    return total_belief_for_node
 
+def update_posteriors_build(strategy: AggregationStrategy) -> LanggraphNode:
+    def update_posteriors(state: CodeExplorerState) -> dict[str, Any]:
+        print("Updating posteriors\n========================================")
+        base_hypothesis: InferenceNode = state[BASE_HYPOTHESIS_KEY]
+        print("Before: ", end="")
+        base_hypothesis.write_tree(sys.stdout)
+        print(f"Belief in hypothesis before was: {base_hypothesis.node.belief.mean()}")
+        update_posteriors_recursively(base_hypothesis, strategy)
+        print("After: ", end="")
+        base_hypothesis.write_tree(sys.stdout)
+        print(f"Belief in hypothesis after is: {base_hypothesis.node.belief.mean()}")
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY], inference_stack=[],
+                                 base_hypothesis=base_hypothesis,
+                                 recursion_stack=state[RECURSION_STACK_KEY])
 
-def update_posteriors(state: CodeExplorerState) -> dict[str, Any]:
-    print("Updating posteriors\n========================================")
-    base_hypothesis: InferenceNode = state[BASE_HYPOTHESIS_KEY]
-    print(f"Before: {base_hypothesis.as_tree()}")
-    print(f"Belief in hypothesis before was: {base_hypothesis.node.belief.mean()}")
-    update_posteriors_recursively(base_hypothesis)
-    print(f"After: {base_hypothesis.as_tree()}")
-    print(f"Belief in hypothesis after is: {base_hypothesis.node.belief.mean()}")
-    return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
-                             messages=state[MESSAGES_KEY], inference_stack=[],
-                             base_hypothesis=base_hypothesis,
-                             recursion_stack=state[RECURSION_STACK_KEY])
+    return update_posteriors
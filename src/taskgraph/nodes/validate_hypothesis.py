@@ -1,55 +1,68 @@
+import sys
 from typing import Any
 
+from src.domain.aggregation_strategy import AggregationStrategy
 from src.domain.evidence import Evidence
 from src.domain.induction_node import InferenceNode
 from src.taskgraph.nodes.state_operations import stack, push, pop
+from src.taskgraph.nodes.types import LanggraphNode
+from src.taskgraph.nodes.update_posteriors import update_posteriors_recursively
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, RECURSION_STACK_KEY, \
     BASE_HYPOTHESIS_KEY
 
 
-def validate_hypothesis_init(state: CodeExplorerState) -> dict[str, Any]:
-    print("In Validation Hypothesis Init")
-    print("==============================")
-    print("Setting up bookkeeping for the inference stack...")
-    root_hypothesis: InferenceNode = state[BASE_HYPOTHESIS_KEY]
-    # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "does not interact with", "user", equally_likely(), 1),
-    #                                 [InferenceNode(Hypothesis.create_from_strings("program", "lacks", "input functions", equally_likely(), 0.5),
-    #                                                [
-    #                                                    InferenceNode(Evidence("Search for common input function patterns", 0.5, equally_likely())),
-    #                                                    InferenceNode(Evidence("Analyze function names and docstrings for input-related keywords", 0.5, equally_likely()))
-    #                                                ]),
-    #                                  InferenceNode(Hypothesis.create_from_strings("program", "lacks", "output functions", equally_likely(), 0.5),
-    #                                                [
-    #                                                    InferenceNode(Evidence("Search for print statements in the entire codebase using regex pattern matching", 0.5, equally_likely())),
-    #                                                    InferenceNode(Evidence("Search for custom output function definitions using regex", 0.5, equally_likely()))
-    #                                                ])
-    #                                  ])
-    # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "does not interact with", "user", equally_likely(), 1),
-    #                                 [InferenceNode(Hypothesis.create_from_strings("program", "lacks", "input functions", equally_likely(), 0.5),
-    #                                                [
-    #                                                    InferenceNode(Evidence("Search for common input function patterns", 1.0, equally_likely())),
-    #                                                ]),
-    #                                  InferenceNode(Hypothesis.create_from_strings("program", "lacks", "output functions", equally_likely(), 0.5),
-    #                                                [
-    #                                                    InferenceNode(Evidence("Search for print statements in the entire codebase using regex pattern matching", 0.5, equally_likely())),
-    #                                                    InferenceNode(Evidence("Search for custom output function definitions using regex", 0.5, equally_likely()))
-    #                                                ])
-    #                                  ])
-    # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "has", "low complexity", equally_likely(), 1),
-    #                                 [InferenceNode(Evidence("The cyclomatic complexity is low", 0.5, equally_likely()),
-    #                                                []),
-    #                                  InferenceNode(Evidence("The number of sections is small", 0.5, equally_likely()),
-    #                                                [])
-    #                                  ])
-    print(root_hypothesis.as_tree())
+def validate_hypothesis_init_build(strategy: AggregationStrategy, min_path_contribution: float) -> LanggraphNode:
+    def validate_hypothesis_init(state: CodeExplorerState) -> dict[str, Any]:
+        print("In Validation Hypothesis Init")
+        print("==============================")
+        print("Setting up bookkeeping for the inference stack...")
+        root_hypothesis: InferenceNode = state[BASE_HYPOTHESIS_KEY]
+        if min_path_contribution > 0:
+            pruned_count = root_hypothesis.prune(min_path_contribution)
+            print(f"Pruned {pruned_count} subtrees contributing less than {min_path_contribution} to the root")
+        # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "does not interact with", "user", equally_likely(), 1),
+        #                                 [InferenceNode(Hypothesis.create_from_strings("program", "lacks", "input functions", equally_likely(), 0.5),
+        #                                                [
+        #                                                    InferenceNode(Evidence("Search for common input function patterns", 0.5, equally_likely())),
+        #                                                    InferenceNode(Evidence("Analyze function names and docstrings for input-related keywords", 0.5, equally_likely()))
+        #                                                ]),
+        #                                  InferenceNode(Hypothesis.create_from_strings("program", "lacks", "output functions", equally_likely(), 0.5),
+        #                                                [
+        #                                                    InferenceNode(Evidence("Search for print statements in the entire codebase using regex pattern matching", 0.5, equally_likely())),
+        #                                                    InferenceNode(Evidence("Search for custom output function definitions using regex", 0.5, equally_likely()))
+        #                                                ])
+        #                                  ])
+        # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "does not interact with", "user", equally_likely(), 1),
+        #                                 [InferenceNode(Hypothesis.create_from_strings("program", "lacks", "input functions", equally_likely(), 0.5),
+        #                                                [
+        #                                                    InferenceNode(Evidence("Search for common input function patterns", 1.0, equally_likely())),
+        #                                                ]),
+        #                                  InferenceNode(Hypothesis.create_from_strings("program", "lacks", "output functions", equally_likely(), 0.5),
+        #                                                [
+        #                                                    InferenceNode(Evidence("Search for print statements in the entire codebase using regex pattern matching", 0.5, equally_likely())),
+        #                                                    InferenceNode(Evidence("Search for custom output function definitions using regex", 0.5, equally_likely()))
+        #                                                ])
+        #                                  ])
+        # root_hypothesis = InferenceNode(Hypothesis.create_from_strings("program", "has", "low complexity", equally_likely(), 1),
+        #                                 [InferenceNode(Evidence("The cyclomatic complexity is low", 0.5, equally_likely()),
+        #                                                []),
+        #                                  InferenceNode(Evidence("The number of sections is small", 0.5, equally_likely()),
+        #                                                [])
+        #                                  ])
+        root_hypothesis.write_tree(sys.stdout)
+        # Seed the cached child aggregates so evidence updates only re-aggregate their ancestors
+        update_posteriors_recursively(root_hypothesis, strategy)
 
-    state["recursion_stack"] = [(root_hypothesis, 0)]
-    # recurse(state)
-    # print(f"At the end: stack = {stack(state)}")
-    return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
-                             messages=state[MESSAGES_KEY], inference_stack=[],
-                             base_hypothesis=root_hypothesis, recursion_stack=state[RECURSION_STACK_KEY])
+        state["recursion_stack"] = [(root_hypothesis, 0)]
+        # recurse(state)
+        # print(f"At the end: stack = {stack(state)}")
+        return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
+                                 messages=state[MESSAGES_KEY], inference_stack=[],
+                                 base_hypothesis=root_hypothesis, recursion_stack=state[RECURSION_STACK_KEY],
+                                 visited_evidence=[])
+
+    return validate_hypothesis_init
 
 
 def gather_evidence_with_tool(state: CodeExplorerState) -> None:
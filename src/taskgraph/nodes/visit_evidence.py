@@ -1,22 +1,26 @@
-from typing import Any, Callable, Awaitable
+import time
+from typing import Any, Callable, Awaitable, Optional
 
 from langchain_core.tools import BaseTool
 from langgraph.prebuilt import create_react_agent
 
+from src.domain.aggregation_strategy import AggregationStrategy
 from src.domain.evidence import Evidence
+from src.taskgraph.nodes.evidence_scheduler import ToolLatencies
 from src.taskgraph.nodes.state_operations import stack
 from src.taskgraph.nodes.types import LLM, EvidenceResult
+from src.taskgraph.nodes.update_posteriors import propagate_posterior_change
 from src.taskgraph.state import CodeExplorerState
 from src.taskgraph.state_keys import CURRENT_REQUEST_KEY, INPUT_KEY, MESSAGES_KEY, BASE_HYPOTHESIS_KEY
 
 
-def visit_evidence_build(llm: LLM, tools: list[BaseTool]) -> Callable[
+def visit_evidence_build(llm: LLM, tools: list[BaseTool], strategy: AggregationStrategy,
+                         latencies: Optional[ToolLatencies] = None) -> Callable[
     [CodeExplorerState], Awaitable[dict[str, Any]]]:
     async def visit_evidence(state: CodeExplorerState) -> dict[str, Any]:
         current = stack(state)[-1]
         print(f"Visiting evidence: {current[0].just_str()}")
         le_stack = stack(state)
-        print(f"Evidence is updating count of {le_stack[-2][0].just_str()} from {le_stack[-2][1]} by 1...")
         messages = [
             "You are required to gather evidence for a particular hypothesis using the tools that are available to you.",
             "Don't use a lot of tools. Only use what fits the situation.",
@@ -30,7 +34,13 @@ def visit_evidence_build(llm: LLM, tools: list[BaseTool]) -> Callable[
         agent = create_react_agent(model=llm, tools=tools,
                                    response_format=EvidenceResult, debug=False)
 
+        started_at = time.perf_counter()
         response = await agent.ainvoke({"messages": [{"role": "user", "content": joined_prompt}]})
+        if latencies is not None:
+            tool_names = [tool_call["name"] for message in response["messages"]
+                          for tool_call in getattr(message, "tool_calls", [])]
+            if tool_names:
+                latencies.record(tool_names, time.perf_counter() - started_at)
         print("Response from gathering evidence")
         # print(f"Response from gathering evidence: {response}")
         print("====================================================================================")
@@ -38,10 +48,11 @@ def visit_evidence_build(llm: LLM, tools: list[BaseTool]) -> Callable[
         print(structured_response)
         evidence_node: Evidence = current[0].node
         print(f"Before Evidence Update: {evidence_node.belief}")
+        previous_belief = evidence_node.belief
         evidence_node.belief = evidence_node.belief.update((structured_response["for_hypothesis"], structured_response["against_hypothesis"]))
         print(f"After Evidence Update: {evidence_node.belief}")
-        le_stack[-2] = (le_stack[-2][0], le_stack[-2][1] + 1)
-        # le_stack[-2] = (le_stack[-2][0], 1)
+        propagate_posterior_change(current[0], previous_belief, strategy)
+        print(f"Root belief is now: {state[BASE_HYPOTHESIS_KEY].node.belief}")
         return CodeExplorerState(input=state[INPUT_KEY], current_request=state[CURRENT_REQUEST_KEY],
                                  messages=state[MESSAGES_KEY], inference_stack=[],
                                  base_hypothesis=state[BASE_HYPOTHESIS_KEY],
@@ -13,3 +13,5 @@ VISIT_EVIDENCE_DECISION = "visit_evidence_decision"
 DUMMY_INFERENCE_NODE = InferenceNode(random_hypothesis(), [])
 CONTINUE_RECURSE_INFERENCE_TREE_DECISION = "continue_recurse_inference_tree_decision"
 EXIT_RECURSE_INFERENCE_TREE_DECISION = "exit_recurse_inference_tree_decision"
+HYPOTHESIZE_FROM_PROFILE_DECISION = "hypothesize_from_profile_decision"
+COLLECT_DATA_DECISION = "collect_data_decision"
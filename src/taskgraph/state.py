@@ -1,4 +1,4 @@
-from typing import TypedDict, Annotated
+from typing import TypedDict, Annotated, Any, Optional
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
@@ -15,4 +15,8 @@ class CodeExplorerState(TypedDict):
     inference_stack: list[tuple[InferenceNode, int]]
     base_hypothesis: InferenceNode
     tree_build_status: str
+    # Pre-order TreeTraversal checkpoints: the path from the root to the current node
     recursion_stack: list[tuple[InferenceNode, int]]
+    visited_evidence: list[str]
+    # Overview tool results prefetched at graph start, e.g. the section list and full-codebase complexity
+    codebase_profile: Optional[dict[str, Any]]
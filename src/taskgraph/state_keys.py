@@ -5,3 +5,5 @@ INFERENCE_STACK_KEY = "inference_stack"
 TREE_BUILD_STATUS_KEY = "tree_build_status"
 RECURSION_STACK_KEY = "recursion_stack"
 BASE_HYPOTHESIS_KEY = "base_hypothesis"
+VISITED_EVIDENCE_KEY = "visited_evidence"
+CODEBASE_PROFILE_KEY = "codebase_profile"
@@ -4,3 +4,4 @@ CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE = "cyclomaticComplexityOfFullCodeBase"
 CYCLOMATIC_COMPLEXITY_OF_SECTION = "cyclomaticComplexityOfSection"
 MATCH_REGEX_PATTERN = "matchRegexPattern"
 LIST_SECTIONS = "listSections"
+SEARCH_CODE = "searchCode"
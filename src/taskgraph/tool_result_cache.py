@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.taskgraph.tool_names import CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE, CYCLOMATIC_COMPLEXITY_OF_SECTION, \
+    LIST_SECTIONS, MATCH_REGEX_PATTERN
+
+TOOL_RESULT_CACHE = "TOOL_RESULT_CACHE"
+TOOL_RESULT_CACHE_SIZE = "TOOL_RESULT_CACHE_SIZE"
+TOOL_RESULT_CACHE_DB = "TOOL_RESULT_CACHE_DB"
+CACHEABLE_TOOLS = "CACHEABLE_TOOLS"
+CODEBASE_PATH = "CODEBASE_PATH"
+
+# Tools whose results depend only on their arguments and the codebase under analysis
+DETERMINISTIC_TOOLS = [CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE, CYCLOMATIC_COMPLEXITY_OF_SECTION, LIST_SECTIONS,
+                       MATCH_REGEX_PATTERN]
+
+
+def codebase_hash(path: Optional[str]) -> Optional[str]:
+    # Content hash of the file or directory being analysed; any edit to it gives every cached result a new key
+    if not path:
+        return None
+    root = Path(path)
+    files = [root] if root.is_file() else sorted(file for file in root.rglob("*") if file.is_file())
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(str(file.relative_to(root) if file != root else file.name).encode())
+        digest.update(b"\0")
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def canonical_arguments(arguments: dict[str, Any]) -> str:
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """
+    Results of deterministic tool calls, keyed by tool name, canonicalised arguments and codebase hash. Recent
+    results are kept in an in-memory LRU; with a database path, results are also written to SQLite so they
+    survive restarts. Without a codebase hash, results cannot be told apart across codebase edits, so only the
+    in-memory tier is used.
+    """
+
+    def __init__(self, cacheable_tools: list[str], max_entries: int = 1024,
+                 codebase_version: Optional[str] = None, db_path: Optional[str] = None):
+        self.cacheable_tools = set(cacheable_tools)
+        self.max_entries = max_entries
+        self.codebase_version = codebase_version or "unversioned"
+        self.entries: OrderedDict[str, Any] = OrderedDict()
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.db: Optional[sqlite3.Connection] = None
+        if db_path and codebase_version:
+            self.db = sqlite3.connect(db_path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, result BLOB)")
+            self.db.commit()
+
+    def key(self, tool_name: str, arguments: dict[str, Any]) -> str:
+        return f"{self.codebase_version}\0{tool_name}\0{canonical_arguments(arguments)}"
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+        if self.db is not None:
+            row = self.db.execute("SELECT result FROM tool_results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = pickle.loads(row[0])
+                self.remember(key, result)
+                return True, result
+        return False, None
+
+    def put(self, key: str, result: Any) -> None:
+        self.remember(key, result)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO tool_results (key, result) VALUES (?, ?)",
+                            (key, pickle.dumps(result)))
+            self.db.commit()
+
+    def remember(self, key: str, result: Any) -> None:
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def call(self, tool_name: str, arguments: dict[str, Any], call_tool) -> Any:
+        key = self.key(tool_name, arguments)
+        found, result = self.get(key)
+        if found:
+            self.hits += 1
+            return result
+        # Identical calls already running are awaited rather than sent to the server again
+        if key in self.in_flight:
+            self.hits += 1
+            return await asyncio.shield(self.in_flight[key])
+        self.misses += 1
+        in_flight = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = in_flight
+        try:
+            result = await call_tool(**arguments)
+            # Failed calls raise, and are never cached
+            self.put(key, result)
+            in_flight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            in_flight.cancel()
+            raise
+        except Exception as e:
+            in_flight.set_exception(e)
+            # Nobody else may be waiting on it; don't let the loop warn about an unretrieved exception
+            in_flight.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+    def cached(self, tool: BaseTool) -> BaseTool:
+        if tool.name not in self.cacheable_tools or not isinstance(tool, StructuredTool) or tool.coroutine is None:
+            return tool
+        call_tool = tool.coroutine
+
+        async def cached_call(**arguments):
+            return await self.call(tool.name, arguments, call_tool)
+
+        return tool.model_copy(update={"coroutine": cached_call})
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+
+
+def cached_tools(tools: list[BaseTool], cache: Optional[ToolResultCache]) -> list[BaseTool]:
+    return tools if cache is None else [cache.cached(tool) for tool in tools]
+
+
+def tool_result_cache_from_env() -> Optional[ToolResultCache]:
+    if os.environ.get(TOOL_RESULT_CACHE, "true").lower() != "true":
+        return None
+    cacheable = os.environ.get(CACHEABLE_TOOLS)
+    return ToolResultCache([name.strip() for name in cacheable.split(",") if name.strip()] if cacheable
+                           else DETERMINISTIC_TOOLS,
+                           int(os.environ.get(TOOL_RESULT_CACHE_SIZE, "1024")),
+                           codebase_hash(os.environ.get(CODEBASE_PATH)),
+                           os.environ.get(TOOL_RESULT_CACHE_DB))
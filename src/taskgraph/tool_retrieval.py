@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+from langchain_core.tools import BaseTool
+
+from src.embedding.embedding_models import encode, embedding_model_name, QUERY_PROMPT, PASSAGE_PROMPT
+from src.taskgraph.nodes.types import LLM
+
+TOOL_RETRIEVAL_TOP_K = "TOOL_RETRIEVAL_TOP_K"
+TOOL_EMBEDDING_CACHE = "TOOL_EMBEDDING_CACHE"
+DEFAULT_TOOL_EMBEDDING_CACHE = "~/.cache/inductor/tool_embeddings"
+
+
+def tool_text(tool: BaseTool) -> str:
+    return f"{tool.name}: {tool.description or ''}"
+
+
+def tool_schema_hash(tool: BaseTool, model_name: str) -> str:
+    # Any change to the tool's name, description or arguments (or to the embedding model) gives a new vector
+    schema = json.dumps({"model": model_name, "name": tool.name, "description": tool.description,
+                         "args": tool.args}, sort_keys=True, default=str)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+class ToolEmbeddingIndex:
+    """
+    Embeddings of every tool's name and description, one unit-length row per tool, so the tools most relevant
+    to a request are found with one matrix-vector product. Vectors are cached on disk by schema hash, and only
+    new or changed tools are encoded.
+    """
+
+    def __init__(self, tools: list[BaseTool], cache_dir: str):
+        self.tools = tools
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        model_name = embedding_model_name()
+        cache_files = [self.cache_dir / f"{tool_schema_hash(tool, model_name)}.npy" for tool in tools]
+        vectors: list[Optional[np.ndarray]] = [np.load(file) if file.exists() else None for file in cache_files]
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            print(f"Embedding {len(missing)} of {len(tools)} tools")
+            encoded = encode([tool_text(tools[index]) for index in missing], PASSAGE_PROMPT)
+            for index, vector in zip(missing, encoded):
+                np.save(cache_files[index], vector)
+                vectors[index] = vector
+        self.matrix = np.stack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def top_k(self, query: str, k: int) -> list[BaseTool]:
+        if k >= len(self.tools):
+            return self.tools
+        scores = self.matrix @ encode([query], QUERY_PROMPT)[0]
+        best = np.argpartition(-scores, k)[:k]
+        return [self.tools[index] for index in best[np.argsort(-scores[best])]]
+
+
+def query_text(llm_input: Any) -> str:
+    # The text the tools should be relevant to: the whole prompt, whether a string, messages or plain strings
+    if isinstance(llm_input, str):
+        return llm_input
+    return "\n".join(item.content if isinstance(item, BaseMessage) else str(item) for item in llm_input
+                     if not isinstance(item, BaseMessage) or isinstance(item.content, str))
+
+
+class ToolRetrievingLLM:
+    """Stands in for an LLM with tools bound: each call binds only the k tools most similar to its prompt."""
+
+    def __init__(self, llm: LLM, index: ToolEmbeddingIndex, k: int):
+        self.llm = llm
+        self.index = index
+        self.k = k
+
+    def bound(self, llm_input: Any) -> LLM:
+        return self.llm.bind_tools(self.index.top_k(query_text(llm_input), self.k))
+
+    def invoke(self, llm_input: Any, *args, **kwargs) -> BaseMessage:
+        return self.bound(llm_input).invoke(llm_input, *args, **kwargs)
+
+    async def ainvoke(self, llm_input: Any, *args, **kwargs) -> BaseMessage:
+        # Encoding the query is CPU-bound, keep it off the event loop
+        bound = await asyncio.to_thread(self.bound, llm_input)
+        return await bound.ainvoke(llm_input, *args, **kwargs)
+
+
+@dataclass
+class ToolRetrieval:
+    index: ToolEmbeddingIndex
+    k: int
+
+    def retrieving(self, llm: LLM) -> ToolRetrievingLLM:
+        return ToolRetrievingLLM(llm, self.index, self.k)
+
+
+def tool_retrieval_from_env(tools: list[BaseTool]) -> Optional[ToolRetrieval]:
+    top_k = os.environ.get(TOOL_RETRIEVAL_TOP_K)
+    if not top_k:
+        return None
+    return ToolRetrieval(ToolEmbeddingIndex(tools, os.environ.get(TOOL_EMBEDDING_CACHE, DEFAULT_TOOL_EMBEDDING_CACHE)),
+                         int(top_k))
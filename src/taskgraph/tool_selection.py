@@ -0,0 +1,72 @@
+import json
+from typing import Optional
+
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.taskgraph.node_names import EXECUTIVE_AGENT, COLLECT_DATA_FOR_HYPOTHESIS, HYPOTHESIZE, EXPLORE_FREELY, \
+    SYSTEM_QUERY, DECOMPOSE_HYPOTHESIS, EXPAND_INFERENCE_FRONTIER, VISIT_EVIDENCE
+from src.taskgraph.nodes.types import LLM
+from src.taskgraph.tool_retrieval import ToolRetrieval
+from src.taskgraph.tool_names import CYCLOMATIC_COMPLEXITY_OF_SECTION, CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE, \
+    MATCH_REGEX_PATTERN, LIST_SECTIONS, SEARCH_CODE, CREATE_EVIDENCE_STRATEGY_MCP_TOOL_NAME, \
+    BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME
+
+EVIDENCE_GATHERING_TOOLS = [CYCLOMATIC_COMPLEXITY_OF_SECTION, CYCLOMATIC_COMPLEXITY_OF_FULL_CODEBASE,
+                            MATCH_REGEX_PATTERN, LIST_SECTIONS, SEARCH_CODE]
+INFERENCE_TREE_BUILDING_TOOLS = [CREATE_EVIDENCE_STRATEGY_MCP_TOOL_NAME, BREAKDOWN_HYPOTHESIS_MCP_TOOL_NAME]
+HYPOTHESIS_PERSISTENCE_TOOLS = ["create_hypothesis", "create_hypothesis_with_objects", "create_multiple_hypotheses",
+                                "create_multiple_hypotheses_with_objects", "find_hypotheses", "find_subjects",
+                                "find_objects"]
+
+# The tools bound to each LLM-calling node; None binds every tool. Nodes which must answer without calling
+# tools (routing, questions about the tools themselves) get none, so their calls carry no tool schemas.
+NODE_TOOLS: dict[str, Optional[list[str]]] = {
+    EXECUTIVE_AGENT: [],
+    COLLECT_DATA_FOR_HYPOTHESIS: EVIDENCE_GATHERING_TOOLS,
+    HYPOTHESIZE: HYPOTHESIS_PERSISTENCE_TOOLS,
+    EXPLORE_FREELY: None,
+    SYSTEM_QUERY: [],
+    DECOMPOSE_HYPOTHESIS: INFERENCE_TREE_BUILDING_TOOLS,
+    EXPAND_INFERENCE_FRONTIER: INFERENCE_TREE_BUILDING_TOOLS,
+    VISIT_EVIDENCE: EVIDENCE_GATHERING_TOOLS,
+}
+
+MAX_DESCRIPTION_LENGTH = 120
+
+
+def tools_for(node_name: str, tools: list[BaseTool]) -> list[BaseTool]:
+    tool_names = NODE_TOOLS.get(node_name)
+    if tool_names is None:
+        return tools
+    return [tool for tool in tools if tool.name in tool_names]
+
+
+def llm_for(node_name: str, llm: LLM, tools: list[BaseTool], tool_retrieval: Optional[ToolRetrieval] = None) -> LLM:
+    # Nodes open to every tool get only the ones most relevant to each prompt, if tool retrieval is on
+    if NODE_TOOLS.get(node_name) is None and tool_retrieval is not None:
+        return tool_retrieval.retrieving(llm)
+    node_tools = tools_for(node_name, tools)
+    return llm.bind_tools(node_tools) if node_tools else llm
+
+
+def compact_tool_description(tool: BaseTool) -> str:
+    # name(argument: type, ...): the first line of the description, instead of the tool's full repr and schema
+    arguments = ", ".join(f"{name}: {schema.get('type', 'any')}" for name, schema in tool.args.items())
+    summary = (tool.description or "").strip().split("\n")[0].strip()
+    if len(summary) > MAX_DESCRIPTION_LENGTH:
+        summary = summary[:MAX_DESCRIPTION_LENGTH - 3] + "..."
+    return f"{tool.name}({arguments}): {summary}" if summary else f"{tool.name}({arguments})"
+
+
+def compact_tool_descriptions(tools: list[BaseTool]) -> str:
+    return "\n".join(f"- {compact_tool_description(tool)}" for tool in tools)
+
+
+def approximate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text and JSON
+    return (len(text) + 3) // 4
+
+
+def schema_tokens(tools: list[BaseTool]) -> int:
+    return approximate_tokens(json.dumps([convert_to_openai_tool(tool) for tool in tools]))
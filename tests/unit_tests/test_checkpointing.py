@@ -0,0 +1,86 @@
+import asyncio
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from src.domain.beta_bernoulli_belief import BetaBernoulliBelief
+from src.domain.evidence import Evidence
+from src.domain.hypothesis import Hypothesis
+from src.domain.hypothesis_object import HypothesisObject
+from src.domain.hypothesis_subject import HypothesisSubject
+from src.domain.induction_node import InferenceNode
+from src.taskgraph.checkpointing import InferenceStateSerializer, sqlite_checkpointer
+
+
+def built_tree() -> InferenceNode:
+    root = InferenceNode(Hypothesis(HypothesisSubject("PAYROLL"), "calls", HypothesisObject("TAXCALC")), [])
+    sub_hypothesis = InferenceNode(Hypothesis(HypothesisSubject("TAXCALC"), "reads", HypothesisObject("RATES"),
+                                              contribution_to_root=0.6), [])
+    sub_hypothesis.add_all([InferenceNode(Evidence("BAL to TAXCALC", 0.7, BetaBernoulliBelief(3, 1)), []),
+                            InferenceNode(Evidence("RATES opened", 0.4, BetaBernoulliBelief(1, 2)), [])])
+    root.add_all([sub_hypothesis, InferenceNode(Evidence("CALL TAXCALC", 0.5, BetaBernoulliBelief(2, 1)), [])])
+    return root
+
+
+def saved_and_restored(channel_values: dict, writes: list) -> tuple[dict, list]:
+    async def round_trip():
+        async with sqlite_checkpointer(":memory:") as saver:
+            config = {"configurable": {"thread_id": "session", "checkpoint_ns": ""}}
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = channel_values
+            checkpoint["channel_versions"] = {channel: 1 for channel in channel_values}
+            saved_config = await saver.aput(config, checkpoint, {"source": "loop", "step": 1},
+                                            checkpoint["channel_versions"])
+            await saver.aput_writes(saved_config, writes, "task")
+            restored = await saver.aget_tuple(saved_config)
+            return restored.checkpoint["channel_values"], [(channel, value)
+                                                           for _, channel, value in restored.pending_writes]
+
+    return asyncio.run(round_trip())
+
+
+def test_checkpoint_round_trips_a_built_tree_and_its_stacks():
+    root = built_tree()
+    sub_hypothesis, evidence = root.children[0], root.children[0].children[1]
+    channel_values = {"base_hypothesis": root, "recursion_stack": [(root, 0), (sub_hypothesis, 1), (evidence, 2)],
+                      "inference_stack": [], "visited_evidence": [evidence.node.id], "tree_build_status": "done"}
+
+    restored, _ = saved_and_restored(channel_values, [])
+
+    restored_root = restored["base_hypothesis"]
+    assert restored_root.id == root.id
+    assert restored_root.as_tree() == root.as_tree()
+    assert restored_root.children[0].children[0].node.belief.alpha == 3
+    assert restored_root.children[0].children[0].parent is restored_root.children[0]
+    # The stack points into the restored tree, not into a copy of it
+    stack = restored["recursion_stack"]
+    assert [(inference_node.id, counter) for inference_node, counter in stack] == [
+        (root.id, 0), (sub_hypothesis.id, 1), (evidence.id, 2)]
+    assert stack[1][0] is restored_root.children[0]
+    assert isinstance(stack[0], tuple)
+    assert restored["inference_stack"] == []
+    assert restored["visited_evidence"] == [evidence.node.id]
+    assert restored["tree_build_status"] == "done"
+
+
+def test_pending_writes_of_trees_restore_onto_the_checkpointed_tree():
+    root = built_tree()
+    sub_hypothesis = root.children[0]
+
+    restored, writes = saved_and_restored({"base_hypothesis": root},
+                                          [("base_hypothesis", root), ("recursion_stack", [(sub_hypothesis, 0)])])
+
+    written = dict(writes)
+    assert written["base_hypothesis"] is restored["base_hypothesis"]
+    assert written["recursion_stack"][0][0] is restored["base_hypothesis"].children[0]
+
+
+def test_every_load_restores_the_saved_beliefs_onto_a_fresh_tree():
+    serializer = InferenceStateSerializer()
+    data = serializer.dumps_typed({"base_hypothesis": built_tree()})
+
+    first = serializer.loads_typed(data)["base_hypothesis"]
+    first.node.belief = BetaBernoulliBelief(9, 1)
+    second = serializer.loads_typed(data)["base_hypothesis"]
+
+    assert second is not first
+    assert (second.node.belief.alpha, second.node.belief.beta) == (1, 1)